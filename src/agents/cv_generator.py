@@ -8,8 +8,7 @@ import json
 import sys
 import logging
 from pathlib import Path
-from typing import Dict, Any, Optional
-from datetime import datetime
+from typing import Dict, Any, Optional, Tuple
 
 # Import pour async file operations
 try:
@@ -20,8 +19,11 @@ except ImportError:
 
 # Import corrigé
 sys.path.insert(0, str(Path(__file__).parent.parent))
-from utils.openrouter_client import OpenRouterClient
+from utils.openrouter_client import OpenRouterClient, get_openrouter_client
 from utils.reactive_resume_client import ReactiveResumeClient, ReactiveResumeError
+from utils.context_builder import ContextBuilder, estimate_tokens
+from utils.bm25 import BM25Ranker, build_query
+from utils.text_index import split_paragraphs
 from config.settings import settings, validate_config
 
 # Configuration du logging
@@ -31,17 +33,82 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+CV_INSTRUCTIONS = """INSTRUCTIONS:
+Tu dois générer un CV JSON au format Reactive Resume qui MET EN VALEUR les expériences et compétences correspondent aux thèmes de l'offre.
+
+1. Utilise UNIQUEMENT les informations du profil du candidat et du contexte de l'offre fournis
+2. Adapte le contenu pour répondre aux exigences de l'offre
+3. Respecte EXACTEMENT la structure JSON du guide Reactive Resume
+4. Génère un UUID unique pour chaque item (utilise uuid.uuid4())
+5. Utilise du HTML pour le summary et les descriptions (<p>, <ul>, <li>)
+6. Assure-toi que le CV soit ATS-friendly
+
+Structure JSON attendue:
+{
+  "basics": { ... },
+  "sections": {
+    "summary": { ... },
+    "experience": { "items": [{ ... }] },
+    "education": { "items": [{ ... }] },
+    "skills": { "items": [{ ... }] },
+    "projects": { "items": [{ ... }] },
+    "languages": { "items": [{ ... }] },
+    "certifications": { "items": [{ ... }] },
+    "profiles": { "items": [{ ... }] },
+    "awards": { "items": [{ ... }] },
+    "volunteer": { "items": [{ ... }] },
+    "publications": { "items": [{ ... }] },
+    "references": { "visible": false, "items": [] },
+    "interests": { "items": [{ ... }] },
+    "custom": {}
+  },
+  "metadata": {
+    "template": "pikachu",
+    "layout": [...],
+    "theme": { ... },
+    "typography": { ... }
+  }
+}
+"""
+
+# Identifiant de l'expérience professionnelle dans l'index texte
+XPPRO_DOCUMENT = "identity/xppro"
+
+# Part maximale du budget (hors instructions) accordée à chaque section;
+# ce qu'une section courte n'utilise pas revient à l'éducation, qui
+# reçoit tout ce qui reste
+CV_CONTEXT_SHARES = {
+    "analyse": 0.35,
+    "profil": 0.15,
+    "experience": 0.30,
+}
+
+# Rappel des expériences pertinentes quand l'expérience complète est dans le préfixe
+CV_HIGHLIGHTS = 5
+CV_HIGHLIGHT_CHARS = 160
+
 
 class CVGenerator:
     """Agent pour générer les CV au format Reactive Resume"""
 
-    def __init__(self):
-        """Initialise le générateur de CV"""
-        self.openrouter = OpenRouterClient()
+    def __init__(self, openrouter: Optional[OpenRouterClient] = None, ranker: Optional[BM25Ranker] = None):
+        """
+        Initialise le générateur de CV
+
+        Args:
+            openrouter: Client OpenRouter à utiliser (défaut: client partagé)
+            ranker: Classement BM25 des paragraphes d'éducation et d'expérience
+                (défaut: recherche par sous-chaîne sur les fichiers entiers)
+        """
+        self.openrouter = openrouter or get_openrouter_client()
+        self.ranker = ranker
         self.reactive_client = ReactiveResumeClient(
             timeout=settings.reactive_resume_timeout,
-            max_retries=settings.reactive_resume_max_retries
+            max_retries=settings.reactive_resume_max_retries,
+            registry_path=Path(__file__).parent.parent.parent / settings.resume_registry_file
         )
+        # Tokens consommés par section lors du dernier build_cv_prompt
+        self.last_context_usage: Dict[str, int] = {}
 
         # Validation de la configuration
         try:
@@ -50,15 +117,33 @@ class CVGenerator:
             logger.error(f"Configuration invalide: {e}")
             raise
 
-    def build_cv_context(
+    def build_cv_prompt(
         self,
         offer_analysis: str,
         identity_context: Dict[str, str],
         education_context: Dict[str, str],
         themes: list
-    ) -> str:
+    ) -> Tuple[str, str]:
         """
-        Construit le prompt上下文 pour la génération du CV
+        Construit le prompt de génération du CV en deux parties
+
+        Le préfixe (instructions, structure JSON, profil et expérience du
+        candidat) ne dépend pas de l'offre: il est identique octet pour octet
+        d'une offre à l'autre, ce qui permet au fournisseur de le servir
+        depuis son cache de prompt. La partie propre à l'offre vient après.
+
+        Le tout tient dans le budget CV_CONTEXT_TOKEN_BUDGET: les instructions
+        et les thèmes sont toujours inclus, l'analyse, le profil et
+        l'expérience sont plafonnés selon CV_CONTEXT_SHARES, puis le reste est
+        rempli par les extraits d'éducation les plus pertinents (chaque entrée
+        une seule fois).
+
+        Avec un classement BM25, les extraits sont les paragraphes les mieux
+        classés pour les thèmes et l'analyse. Une expérience trop longue pour
+        son plafond quitte le préfixe: seuls ses paragraphes les plus
+        pertinents (dans leur ordre d'origine) sont placés dans la partie
+        propre à l'offre. Sinon, cette partie rappelle brièvement les
+        expériences à mettre en avant.
 
         Args:
             offer_analysis: Analyse de l'offre d'emploi
@@ -67,77 +152,155 @@ class CVGenerator:
             themes: Thèmes extraits de l'offre
 
         Returns:
-            Prompt complet pour l'IA
+            (préfixe stable, partie propre à l'offre)
         """
-        # Filtrer l'éducation selon les thèmes
-        relevant_education = []
-        for theme in themes:
-            for key, content in education_context.items():
-                if theme.lower() in key.lower() or theme.lower() in content.lower():
-                    relevant_education.append(f"**{key}**: {content[:200]}...")
+        builder = ContextBuilder(settings.cv_context_token_budget)
 
-        education_text = "\n".join(relevant_education) if relevant_education else "Aucune éducation spécifique trouvée pour ces thèmes."
+        # Plafonds calculés hors contenu de l'offre pour garder un préfixe stable
+        instructions = builder.reserve("instructions", CV_INSTRUCTIONS)
+        available = builder.remaining
+        caps = {name: int(available * share) for name, share in CV_CONTEXT_SHARES.items()}
+
+        personnal_text = builder.add(
+            "profil", identity_context.get('personnal', 'Non disponible'), max_tokens=caps["profil"]
+        )
+        xppro = identity_context.get('xppro', 'Non disponible')
+        query = build_query(themes, offer_analysis) if self.ranker is not None else None
+        xppro_in_prefix = query is None or estimate_tokens(xppro) <= caps["experience"]
+        xppro_text = builder.add("experience", xppro, max_tokens=caps["experience"]) if xppro_in_prefix else ""
+
+        themes_text = builder.add("themes", ', '.join(themes))
+        analysis_text = builder.add("analyse", offer_analysis, max_tokens=caps["analyse"])
+
+        highlights_text = ""
+        if query is not None:
+            scores = {
+                para: score
+                for _, para, _, score in self.ranker.top_k(query, len(self.ranker), documents=[XPPRO_DOCUMENT])
+            }
+            paragraphs = split_paragraphs(xppro)
+            if xppro_in_prefix:
+                # Rappel court des paragraphes d'expérience les plus pertinents
+                best = sorted(scores, key=lambda para: -scores[para])[:CV_HIGHLIGHTS]
+                highlights_text = builder.add("rappels", "\n".join(
+                    f"- {paragraphs[para].splitlines()[0][:CV_HIGHLIGHT_CHARS]}" for para in sorted(best)
+                    if para < len(paragraphs)
+                ))
+            else:
+                # Les paragraphes sans terme commun complètent le plafond, les premiers d'abord
+                selected = builder.add_ranked(
+                    "experience",
+                    [
+                        (para, text, scores.get(para, 0) + 1e-6 * (len(paragraphs) - para))
+                        for para, text in enumerate(paragraphs)
+                    ],
+                    max_tokens=caps["experience"]
+                )
+                xppro_text = "\n\n".join(text for _, text in sorted(selected)) or builder.add(
+                    "experience", xppro, max_tokens=caps["experience"]
+                )
+
+        # Filtrer l'éducation selon les thèmes, entrées classées par pertinence
+        if query is not None:
+            hits = self.ranker.top_k(query, settings.cv_context_top_k, documents=education_context)
+            snippets = [(f"{doc_id}#{para}", text, score) for doc_id, para, text, score in hits]
+        else:
+            snippets = [
+                (key, content, self.education_relevance(key, content, themes))
+                for key, content in education_context.items()
+            ]
+
+        # Les paragraphes d'un même fichier sont regroupés sous son nom
+        grouped: Dict[str, list] = {}
+        for key, content in builder.add_ranked(
+            "education", snippets, max_item_tokens=settings.cv_context_snippet_tokens
+        ):
+            grouped.setdefault(key.split('#')[0], []).append(content)
+        relevant_education = [f"**{key}**: {' '.join(parts)}" for key, parts in grouped.items()]
 
-        context = f"""
-CONTEXTE COMPLET POUR GÉNÉRATION CV:
+        education_text = "\n".join(relevant_education) if relevant_education else "Aucune éducation spécifique trouvée pour ces thèmes."
 
-=== ANALYSE DE L'OFFRE ===
-{offer_analysis}
+        self.last_context_usage = dict(builder.usage)
+        logger.info(f"Contexte CV: {builder.report()}")
+        print(f"  📏 Contexte CV: {builder.used}/{builder.token_budget} tokens")
 
+        prefix = f"""{instructions}
 === IDENTITÉ DU CANDIDAT ===
 **Profil Personnel:**
-{identity_context.get('personnal', 'Non disponible')}
-
+{personnal_text}
+"""
+        if xppro_in_prefix:
+            prefix += f"""
 **Expérience Professionnelle:**
-{identity_context.get('xppro', 'Non disponible')}
+{xppro_text}
+"""
+
+        suffix = f"""
+CONTEXTE PROPRE À L'OFFRE:
 
+=== ANALYSE DE L'OFFRE ===
+{analysis_text}
+"""
+        if not xppro_in_prefix:
+            suffix += f"""
+=== EXPÉRIENCE PROFESSIONNELLE PERTINENTE ===
+{xppro_text}
+"""
+        elif highlights_text:
+            suffix += f"""
+=== EXPÉRIENCES À METTRE EN AVANT ===
+{highlights_text}
+"""
+        suffix += f"""
 === ÉDUCATION PERTINENTE ===
 {education_text}
 
 === THÈMES DE L'OFFRE ===
-{', '.join(themes)}
+{themes_text}
 
-INSTRUCTIONS:
-Tu dois générer un CV JSON au format Reactive Resume qui MET EN VALEUR les expériences et compétences correspondent aux thèmes de l'offre.
+Réponds UNIQUEMENT avec le JSON valide, sans aucun texte avant ou après.
+"""
 
-1. Utilise UNIQUEMENT les informations du contexte ci-dessus
-2. Adapte le contenu pour répondre aux exigences de l'offre
-3. Respecte EXACTEMENT la structure JSON du guide Reactive Resume
-4. Génère un UUID unique pour chaque item (utilise uuid.uuid4())
-5. Utilise du HTML pour le summary et les descriptions (<p>, <ul>, <li>)
-6. Assure-toi que le CV soit ATS-friendly
+        return prefix, suffix
 
-Structure JSON attendue:
-{{
-  "basics": {{ ... }},
-  "sections": {{
-    "summary": {{ ... }},
-    "experience": {{ "items": [{{ ... }}] }},
-    "education": {{ "items": [{{ ... }}] }},
-    "skills": {{ "items": [{{ ... }}] }},
-    "projects": {{ "items": [{{ ... }}] }},
-    "languages": {{ "items": [{{ ... }}] }},
-    "certifications": {{ "items": [{{ ... }}] }},
-    "profiles": {{ "items": [{{ ... }}] }},
-    "awards": {{ "items": [{{ ... }}] }},
-    "volunteer": {{ "items": [{{ ... }}] }},
-    "publications": {{ "items": [{{ ... }}] }},
-    "references": {{ "visible": false, "items": [] }},
-    "interests": {{ "items": [{{ ... }}] }},
-    "custom": {{}}
-  }},
-  "metadata": {{
-    "template": "pikachu",
-    "layout": [...],
-    "theme": {{ ... }},
-    "typography": {{ ... }}
-  }}
-}}
+    def build_cv_context(
+        self,
+        offer_analysis: str,
+        identity_context: Dict[str, str],
+        education_context: Dict[str, str],
+        themes: list
+    ) -> str:
+        """
+        Construit le prompt上下文 pour la génération du CV
 
-Réponds UNIQUEMENT avec le JSON valide, sans aucun texte avant ou après.
-"""
+        Returns:
+            Prompt complet pour l'IA (préfixe stable puis partie propre à l'offre)
+        """
+        return "".join(self.build_cv_prompt(offer_analysis, identity_context, education_context, themes))
 
-        return context
+    @staticmethod
+    def education_relevance(key: str, content: str, themes: list) -> float:
+        """
+        Score de pertinence d'une entrée d'éducation pour les thèmes de l'offre
+        (recherche par sous-chaîne, utilisée sans classement BM25)
+
+        Un thème présent dans le nom de l'entrée compte davantage qu'une
+        mention dans son contenu; les mentions répétées sont plafonnées.
+
+        Returns:
+            Score (0 = aucun thème trouvé)
+        """
+        key_lower = key.lower()
+        content_lower = content.lower()
+        score = 0.0
+        for theme in themes:
+            theme_lower = theme.lower()
+            if not theme_lower:
+                continue
+            if theme_lower in key_lower:
+                score += 3
+            score += min(content_lower.count(theme_lower), 5)
+        return score
 
     async def generate_cv_json(
         self,
@@ -154,21 +317,15 @@ Réponds UNIQUEMENT avec le JSON valide, sans aucun texte avant ou après.
         """
         print("  📝 Génération du CV par IA...")
 
-        context = self.build_cv_context(
+        prefix, context = self.build_cv_prompt(
             offer_analysis, identity_context, education_context, themes
         )
 
-        cv_json = await self.openrouter.generate_cv_json(context)
+        cv_json = await self.openrouter.generate_cv_json(context, prefix=prefix)
 
         print("  ✅ CV JSON généré avec succès")
 
-        # Sauvegarde optionnelle du JSON pour debug
-        from pathlib import Path
-        BASE_DIR = Path(__file__).parent.parent.parent
-        json_output = BASE_DIR / "outputs" / f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_cv_debug.json"
-        async with aiofiles.open(json_output, 'w') as f:
-            await f.write(json.dumps(cv_json, indent=2, ensure_ascii=False))
-
+        # Le JSON est conservé par l'orchestrateur (outputs/.checkpoints/<offre>_cv.json)
         return cv_json
 
     async def send_to_reactive_resume(self, cv_json: Dict[str, Any], offer_name: str) -> str:
@@ -196,7 +353,8 @@ Réponds UNIQUEMENT avec le JSON valide, sans aucun texte avant ou après.
 
         try:
             # Utiliser le nouveau client avec retry et gestion d'erreurs
-            result_path = await self.reactive_client.create_and_generate_pdf(cv_json, output_path)
+            # Une offre régénérée met à jour son resume existant au lieu d'en importer un nouveau
+            result_path = await self.reactive_client.create_and_generate_pdf(cv_json, output_path, key=offer_name)
 
             print(f"  ✅ PDF généré: {result_path}")
             return str(result_path)
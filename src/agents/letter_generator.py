@@ -5,53 +5,15 @@ Agent de génération de lettre de motivation
 import sys
 import aiofiles
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Tuple
 from datetime import datetime
 
 # Import corrigé
 sys.path.insert(0, str(Path(__file__).parent.parent))
-from utils.openrouter_client import OpenRouterClient
+from utils.openrouter_client import OpenRouterClient, get_openrouter_client
+from config.settings import settings
 
-class LetterGenerator:
-    """Agent pour générer les lettres de motivation"""
-
-    def __init__(self):
-        self.openrouter = OpenRouterClient()
-
-    def build_letter_context(
-        self,
-        offer_analysis: str,
-        identity_context: Dict[str, str],
-        themes: list
-    ) -> str:
-        """
-        Construit le prompt上下文 pour la génération de la lettre
-
-        Args:
-            offer_analysis: Analyse de l'offre d'emploi
-            identity_context: Données personnelles et expérience pro
-            themes: Thèmes extraits de l'offre
-
-        Returns:
-            Prompt complet pour l'IA
-        """
-        context = f"""
-CONTEXTE POUR LA LETTRE DE MOTIVATION:
-
-=== ANALYSE DE L'OFFRE ===
-{offer_analysis}
-
-=== PROFIL DU CANDIDAT ===
-**Informations Personnelles:**
-{identity_context.get('personnal', 'Non disponible')}
-
-**Expérience Professionnelle:**
-{identity_context.get('xppro', 'Non disponible')}
-
-=== THÈMES CLÉS DE L'OFFRE ===
-{', '.join(themes)}
-
-INSTRUCTIONS DE RÉDACTION:
+LETTER_INSTRUCTIONS = """INSTRUCTIONS DE RÉDACTION:
 Rédige une lettre de motivation professionnelle et personnalisée en français qui:
 
 1. **Structure**:
@@ -80,11 +42,73 @@ Rédige une lettre de motivation professionnelle et personnalisée en français
    - Utilise les balises markdown (# ## ### pour les sections)
    - Utilise **gras** pour les points clés
    - Utilise des listes à puces si nécessaire
+"""
+
+
+class LetterGenerator:
+    """Agent pour générer les lettres de motivation"""
+
+    def __init__(self, openrouter: Optional[OpenRouterClient] = None):
+        self.openrouter = openrouter or get_openrouter_client()
+
+    def build_letter_prompt(
+        self,
+        offer_analysis: str,
+        identity_context: Dict[str, str],
+        themes: list
+    ) -> Tuple[str, str]:
+        """
+        Construit le prompt de la lettre en deux parties
+
+        Le préfixe (consignes de rédaction et profil du candidat) est
+        identique octet pour octet d'une offre à l'autre pour profiter du
+        cache de prompt du fournisseur; l'analyse et les thèmes de l'offre
+        viennent ensuite.
+
+        Args:
+            offer_analysis: Analyse de l'offre d'emploi
+            identity_context: Données personnelles et expérience pro
+            themes: Thèmes extraits de l'offre
+
+        Returns:
+            (préfixe stable, partie propre à l'offre)
+        """
+        prefix = f"""{LETTER_INSTRUCTIONS}
+=== PROFIL DU CANDIDAT ===
+**Informations Personnelles:**
+{identity_context.get('personnal', 'Non disponible')}
+
+**Expérience Professionnelle:**
+{identity_context.get('xppro', 'Non disponible')}
+"""
+
+        suffix = f"""
+CONTEXTE POUR LA LETTRE DE MOTIVATION:
+
+=== ANALYSE DE L'OFFRE ===
+{offer_analysis}
+
+=== THÈMES CLÉS DE L'OFFRE ===
+{', '.join(themes)}
 
 Crée une lettre convaincante qui donne envie au recruteur de rencontrer le candidat.
 """
 
-        return context
+        return prefix, suffix
+
+    def build_letter_context(
+        self,
+        offer_analysis: str,
+        identity_context: Dict[str, str],
+        themes: list
+    ) -> str:
+        """
+        Construit le prompt上下文 pour la génération de la lettre
+
+        Returns:
+            Prompt complet pour l'IA (préfixe stable puis partie propre à l'offre)
+        """
+        return "".join(self.build_letter_prompt(offer_analysis, identity_context, themes))
 
     async def generate_letter(
         self,
@@ -110,14 +134,18 @@ Crée une lettre convaincante qui donne envie au recruteur de rencontrer le cand
         from pathlib import Path
         BASE_DIR = Path(__file__).parent.parent.parent
 
-        context = self.build_letter_context(offer_analysis, identity_context, themes)
-
-        letter_content = await self.openrouter.generate_cover_letter(context)
+        prefix, context = self.build_letter_prompt(offer_analysis, identity_context, themes)
 
-        # Sauvegarde
+        # La lettre est écrite au fil de la génération (streaming)
         letter_path = BASE_DIR / "outputs" / f"{offer_name}_lettre.md"
-        async with aiofiles.open(letter_path, 'w', encoding='utf-8') as f:
-            await f.write(letter_content)
+        letter_content = await self.openrouter.generate_cover_letter(
+            context, prefix=prefix, output_path=letter_path
+        )
+
+        # Sauvegarde (le fichier est déjà complet en streaming)
+        if not settings.openrouter_stream:
+            async with aiofiles.open(letter_path, 'w', encoding='utf-8') as f:
+                await f.write(letter_content)
 
         print(f"  ✅ Lettre générée: {letter_path}")
         return str(letter_path)
@@ -5,21 +5,42 @@ Extrait, analyse et génère les thèmes des offres
 
 import os
 import sys
+import asyncio
+import json
+from datetime import datetime
 from pathlib import Path
-from typing import List, Dict
-import PyPDF2
-import io
+from typing import List, Dict, Optional, Tuple
 import aiofiles
 
 # Import corrigé
 sys.path.insert(0, str(Path(__file__).parent.parent))
-from utils.openrouter_client import OpenRouterClient
+from utils.openrouter_client import (
+    OpenRouterClient, OpenRouterError, OpenRouterRateLimitError, get_openrouter_client,
+    THEMES_SYSTEM_PROMPT, THEMES_USER_PROMPT, STRUCTURED_ANALYSIS_INSTRUCTIONS
+)
+from utils.analysis_cache import AnalysisCache, hash_bytes
+from utils.pdf_extraction import extract_pdf_pages, build_pdf_text
+from utils.pdf_text_cache import PdfTextCache
+from config.settings import settings
 
 class OfferAnalyzer:
     """Agent pour analyser les offres d'emploi"""
 
-    def __init__(self):
-        self.openrouter = OpenRouterClient()
+    def __init__(
+        self,
+        openrouter: Optional[OpenRouterClient] = None,
+        cache: Optional[AnalysisCache] = None,
+        text_cache: Optional[PdfTextCache] = None
+    ):
+        """
+        Args:
+            openrouter: Client OpenRouter à utiliser (défaut: client partagé)
+            cache: Cache des analyses (None = toujours ré-analyser)
+            text_cache: Cache du texte extrait des PDF (None = toujours ré-extraire)
+        """
+        self.openrouter = openrouter or get_openrouter_client()
+        self.cache = cache
+        self.text_cache = text_cache
         self.analysis_prompt = """
 Analyse cette offre d'emploi en français et génère un rapport structuré en markdown.
 
@@ -63,6 +84,10 @@ Conclus ton analyse par un résumé executive de 3-4 lignes.
         """
         Extrait le contenu textuel d'un PDF
 
+        L'extraction PyPDF2 s'exécute dans le pool de processus partagé
+        pour ne pas bloquer la boucle asyncio. Le texte des PDF inchangés
+        est relu depuis le cache d'extraction.
+
         Args:
             pdf_path: Chemin vers le fichier PDF
 
@@ -72,19 +97,23 @@ Conclus ton analyse par un résumé executive de 3-4 lignes.
         print(f"  📄 Extraction du PDF: {pdf_path}")
 
         try:
-            content = ""
-            with open(pdf_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                for page_num, page in enumerate(pdf_reader.pages):
-                    text = page.extract_text()
-                    content += f"\n--- Page {page_num + 1} ---\n{text}\n"
+            pages = None
+            if self.text_cache is not None:
+                sha256, pages = await asyncio.to_thread(self.text_cache.lookup, pdf_path)
+                if pages is not None:
+                    print(f"  ♻️ Texte du PDF trouvé dans le cache ({len(pages)} page(s))")
 
-            return content.strip()
+            if pages is None:
+                pages = await extract_pdf_pages(pdf_path)
+                if self.text_cache is not None:
+                    await asyncio.to_thread(self.text_cache.store, sha256, pages)
+
+            return build_pdf_text(pages)
 
         except Exception as e:
             raise Exception(f"Erreur extraction PDF {pdf_path}: {str(e)}")
 
-    async def analyze_offer(self, offer_name: str, offer_path: str, output_dir: Path) -> Dict[str, str]:
+    async def analyze_offer(self, offer_name: str, offer_path: str, output_dir: Path, force: bool = False) -> Dict[str, str]:
         """
         Analyse complète d'une offre
 
@@ -92,6 +121,7 @@ Conclus ton analyse par un résumé executive de 3-4 lignes.
             offer_name: Nom de l'offre
             offer_path: Chemin vers l'offre (PDF)
             output_dir: Dossier de sortie pour l'analyse
+            force: Ignorer le cache et ré-analyser (le résultat est tout de même mis en cache)
 
         Returns:
             Dictionnaire avec analyse et thèmes
@@ -103,20 +133,38 @@ Conclus ton analyse par un résumé executive de 3-4 lignes.
         if not pdf_path.exists():
             raise Exception(f"Fichier non trouvé: {pdf_path}")
 
-        pdf_content = await self.extract_pdf_content(pdf_path)
+        # Recherche dans le cache (hash du PDF + prompt + modèle)
+        cache_key = None
+        if self.cache is not None:
+            async with aiofiles.open(pdf_path, 'rb') as f:
+                pdf_bytes = await f.read()
+            cache_key = AnalysisCache.compute_key(
+                pdf_bytes,
+                self.effective_prompt(),
+                self.openrouter.model_for("analysis"),
+                self.openrouter.model_for("themes")
+            )
+            cached = None if force else await asyncio.to_thread(self.cache.get, cache_key)
+            if cached is not None:
+                output_file = await self.save_analysis(offer_name, cached['analysis'], output_dir)
+                await self.save_themes(offer_name, cached['analysis'], cached['themes'], output_dir)
+                print(f"  ♻️ Analyse trouvée dans le cache: {output_file}")
+                print(f"  📊 {len(cached['themes'])} thème(s) en cache")
+                return {
+                    'analysis': cached['analysis'],
+                    'themes': cached['themes'],
+                    'output_file': str(output_file)
+                }
 
-        # 2. Analyse avec IA
-        print("  🤖 Analyse par IA...")
-        analysis = await self.openrouter.analyze_offer(pdf_content, self.analysis_prompt)
+        pdf_content = await self.extract_pdf_content(pdf_path)
 
-        # 3. Extraction des thèmes
-        print("  🎯 Extraction des thèmes...")
-        themes_list = await self.openrouter.generate_themes(analysis)
+        # 2-3. Analyse avec IA et extraction des thèmes
+        analysis, themes_list = await self.run_analysis(offer_name, pdf_content, output_dir, force=force)
 
         # 4. Sauvegarde de l'analyse
-        output_file = output_dir / f"{offer_name}.md"
-        async with aiofiles.open(output_file, 'w', encoding='utf-8') as f:
-            await f.write(analysis)
+        output_file = await self.save_analysis(offer_name, analysis, output_dir)
+        if self.cache is not None:
+            await asyncio.to_thread(self.cache.put, cache_key, offer_name, analysis, themes_list)
 
         print(f"  💾 Analyse sauvegardée: {output_file}")
         print(f"  📊 {len(themes_list)} thème(s) extrait(s)")
@@ -127,6 +175,143 @@ Conclus ton analyse par un résumé executive de 3-4 lignes.
             'output_file': str(output_file)
         }
 
+    def effective_prompt(self) -> str:
+        """Prompt réellement envoyé au modèle selon le mode d'analyse"""
+        if settings.analysis_mode == "structured":
+            return self.analysis_prompt + STRUCTURED_ANALYSIS_INSTRUCTIONS
+        return self.analysis_prompt
+
+    async def run_analysis(
+        self,
+        offer_name: str,
+        pdf_content: str,
+        output_dir: Path,
+        force: bool = False
+    ) -> Tuple[str, list]:
+        """
+        Produit l'analyse markdown et les thèmes d'une offre
+
+        En mode "structured", un seul appel renvoie le rapport et les thèmes;
+        si la réponse ne respecte pas le schéma ou si le fournisseur refuse
+        la requête (erreur 4xx, ex: response_format non supporté), on se
+        replie sur le mode "two_pass" (analyse puis extraction des thèmes).
+
+        Args:
+            force: Ignorer le cache des réponses de l'API (la nouvelle réponse y est enregistrée)
+
+        Returns:
+            (analyse markdown, liste des thèmes)
+        """
+        if settings.analysis_mode == "structured":
+            print("  🤖 Analyse structurée par IA (rapport + thèmes)...")
+            try:
+                result = await self.openrouter.analyze_offer_structured(
+                    pdf_content, self.analysis_prompt, use_cache=not force
+                )
+                await self.save_themes(offer_name, result['analysis'], result['themes'], output_dir)
+                return result['analysis'], result['themes']
+            except ValueError as e:
+                print(f"  ⚠️ Analyse structurée invalide ({str(e)}), repli sur l'analyse en deux appels")
+            except OpenRouterError as e:
+                if isinstance(e, OpenRouterRateLimitError) or not 400 <= e.status < 500:
+                    raise
+                print(f"  ⚠️ Analyse structurée refusée ({str(e)}), repli sur l'analyse en deux appels")
+
+        print("  🤖 Analyse par IA...")
+        # Écrite au fil de la génération dans output_dir/<offer_name>.md (streaming)
+        analysis = await self.openrouter.analyze_offer(
+            pdf_content, self.analysis_prompt,
+            output_path=output_dir / f"{offer_name}.md", use_cache=not force
+        )
+
+        # Extraction des thèmes (réutilisés si l'analyse est inchangée)
+        themes = await self.extract_themes(offer_name, analysis, output_dir, force=force)
+        return analysis, themes
+
+    async def save_analysis(self, offer_name: str, analysis: str, output_dir: Path) -> Path:
+        """Écrit l'analyse markdown dans output_dir/<offer_name>.md"""
+        output_file = output_dir / f"{offer_name}.md"
+        async with aiofiles.open(output_file, 'w', encoding='utf-8') as f:
+            await f.write(analysis)
+        return output_file
+
+    def themes_metadata(self, analysis: str) -> Dict[str, str]:
+        """
+        Métadonnées identifiant un jeu de thèmes
+
+        Les thèmes ne sont réutilisables que si l'analyse, le prompt
+        d'extraction et le modèle sont identiques.
+        """
+        prompt = THEMES_SYSTEM_PROMPT + THEMES_USER_PROMPT
+        return {
+            'model': self.openrouter.model_for("themes"),
+            'prompt_sha256': hash_bytes(prompt.encode('utf-8')),
+            'analysis_sha256': hash_bytes(analysis.encode('utf-8'))
+        }
+
+    def themes_file(self, offer_name: str, output_dir: Path) -> Path:
+        """Chemin du fichier de thèmes associé à une analyse"""
+        return output_dir / f"{offer_name}.themes.json"
+
+    async def load_themes(self, offer_name: str, analysis: str, output_dir: Path) -> Optional[list]:
+        """
+        Charge les thèmes persistés s'ils correspondent à l'analyse
+
+        Returns:
+            Liste des thèmes, ou None si absents ou obsolètes
+        """
+        themes_file = self.themes_file(offer_name, output_dir)
+        if not themes_file.exists():
+            return None
+
+        try:
+            async with aiofiles.open(themes_file, 'r', encoding='utf-8') as f:
+                stored = json.loads(await f.read())
+        except (OSError, json.JSONDecodeError):
+            return None
+
+        metadata = self.themes_metadata(analysis)
+        if any(stored.get(key) != value for key, value in metadata.items()):
+            return None
+        return stored.get('themes')
+
+    async def save_themes(self, offer_name: str, analysis: str, themes: list, output_dir: Path) -> Path:
+        """Écrit les thèmes et leurs métadonnées dans <offer_name>.themes.json"""
+        themes_file = self.themes_file(offer_name, output_dir)
+        payload = {
+            'offer_name': offer_name,
+            'themes': themes,
+            **self.themes_metadata(analysis),
+            'generated_at': datetime.now().isoformat(timespec='seconds')
+        }
+        async with aiofiles.open(themes_file, 'w', encoding='utf-8') as f:
+            await f.write(json.dumps(payload, indent=2, ensure_ascii=False))
+        return themes_file
+
+    async def extract_themes(self, offer_name: str, analysis: str, output_dir: Path, force: bool = False) -> list:
+        """
+        Retourne les thèmes de l'analyse, en réutilisant ceux déjà persistés
+
+        Args:
+            offer_name: Nom de l'offre
+            analysis: Analyse markdown de l'offre
+            output_dir: Dossier des analyses
+            force: Ré-extraire même si des thèmes valides sont persistés ou en
+                cache des réponses de l'API
+
+        Returns:
+            Liste des thèmes
+        """
+        themes = None if force else await self.load_themes(offer_name, analysis, output_dir)
+        if themes is not None:
+            print(f"  ♻️ Thèmes réutilisés: {self.themes_file(offer_name, output_dir)}")
+            return themes
+
+        print("  🎯 Extraction des thèmes...")
+        themes = await self.openrouter.generate_themes(analysis, use_cache=not force)
+        await self.save_themes(offer_name, analysis, themes, output_dir)
+        return themes
+
     async def batch_analyze(self, offers: Dict[str, tuple], output_dir: Path) -> Dict[str, Dict]:
         """
         Analyse plusieurs offres en lot
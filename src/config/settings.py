@@ -28,10 +28,44 @@ class Settings(BaseSettings):
     reactive_resume_timeout: int = Field(default=30, env="REACTIVE_RESUME_TIMEOUT")
     reactive_resume_max_retries: int = Field(default=3, env="REACTIVE_RESUME_MAX_RETRIES")
     reactive_resume_retry_delay: float = Field(default=1.0, env="REACTIVE_RESUME_RETRY_DELAY")
+    resume_registry_file: str = Field(default="outputs/.resume_ids.json", env="RESUME_REGISTRY_FILE")
 
     # === OpenRouter ===
     openrouter_api_key: str = Field(default="", env="OPENROUTER_API_KEY")
+    openrouter_base_url: str = Field(default="https://openrouter.ai/api/v1", env="OPENROUTER_BASE_URL")
     openrouter_model: str = Field(default="deepseek/deepseek-v3.2-exp", env="OPENROUTER_MODEL")
+    # Modèle par étape (vide = OPENROUTER_MODEL) et chaîne de repli (séparée par des virgules)
+    openrouter_model_analysis: Optional[str] = Field(default=None, env="OPENROUTER_MODEL_ANALYSIS")
+    openrouter_model_themes: Optional[str] = Field(default=None, env="OPENROUTER_MODEL_THEMES")
+    openrouter_model_cv_json: Optional[str] = Field(default=None, env="OPENROUTER_MODEL_CV_JSON")
+    openrouter_model_letter: Optional[str] = Field(default=None, env="OPENROUTER_MODEL_LETTER")
+    openrouter_fallback_models: str = Field(default="", env="OPENROUTER_FALLBACK_MODELS")
+    openrouter_latency_routing: bool = Field(default=False, env="OPENROUTER_LATENCY_ROUTING")
+    openrouter_model_cooldown: float = Field(default=60.0, env="OPENROUTER_MODEL_COOLDOWN")
+    # Doublement des appels lents (hedging): après le p90 observé de l'étape
+    openrouter_hedging: bool = Field(default=False, env="OPENROUTER_HEDGING")
+    openrouter_hedge_stages: str = Field(default="cv_json", env="OPENROUTER_HEDGE_STAGES")
+    openrouter_hedge_max_ratio: float = Field(default=0.1, env="OPENROUTER_HEDGE_MAX_RATIO")
+    openrouter_hedge_min_delay: float = Field(default=2.0, env="OPENROUTER_HEDGE_MIN_DELAY")
+    openrouter_hedge_min_samples: int = Field(default=5, env="OPENROUTER_HEDGE_MIN_SAMPLES")
+    openrouter_timeout: int = Field(default=120, env="OPENROUTER_TIMEOUT")
+    openrouter_pool_limit: int = Field(default=100, env="OPENROUTER_POOL_LIMIT")
+    openrouter_pool_limit_per_host: int = Field(default=20, env="OPENROUTER_POOL_LIMIT_PER_HOST")
+    openrouter_keepalive_timeout: float = Field(default=60.0, env="OPENROUTER_KEEPALIVE_TIMEOUT")
+    openrouter_dns_cache_ttl: int = Field(default=300, env="OPENROUTER_DNS_CACHE_TTL")
+    openrouter_prompt_cache_control: bool = Field(default=False, env="OPENROUTER_PROMPT_CACHE_CONTROL")
+    openrouter_stream: bool = Field(default=True, env="OPENROUTER_STREAM")
+
+    # === Limites de débit OpenRouter ===
+    openrouter_requests_per_minute: float = Field(default=0, env="OPENROUTER_REQUESTS_PER_MINUTE")
+    openrouter_tokens_per_minute: float = Field(default=0, env="OPENROUTER_TOKENS_PER_MINUTE")
+    openrouter_min_concurrency: int = Field(default=1, env="OPENROUTER_MIN_CONCURRENCY")
+    openrouter_max_concurrency: int = Field(default=16, env="OPENROUTER_MAX_CONCURRENCY")
+    openrouter_rate_limit_target: float = Field(default=0.05, env="OPENROUTER_RATE_LIMIT_TARGET")
+    openrouter_max_retries: int = Field(default=4, env="OPENROUTER_MAX_RETRIES")
+    openrouter_retries_before_fallback: int = Field(default=1, env="OPENROUTER_RETRIES_BEFORE_FALLBACK")
+    openrouter_retry_base_delay: float = Field(default=1.0, env="OPENROUTER_RETRY_BASE_DELAY")
+    openrouter_retry_max_delay: float = Field(default=30.0, env="OPENROUTER_RETRY_MAX_DELAY")
 
     # === Données ===
     base_dir: str = Field(default=".", env="BASE_DIR")
@@ -39,6 +73,39 @@ class Settings(BaseSettings):
     outputs_dir: str = Field(default="outputs", env="OUTPUTS_DIR")
     analysis_dir: str = Field(default="offres/offer_analysis", env="ANALYSIS_DIR")
     data_dir: str = Field(default="data", env="DATA_DIR")
+    job_store_file: str = Field(default="offres/.state/jobs.sqlite3", env="JOB_STORE_FILE")
+
+    # === Analyse des offres ===
+    # "structured": rapport + thèmes en un seul appel JSON (repli sur "two_pass" si invalide)
+    # "two_pass": rapport markdown puis extraction des thèmes (deux appels)
+    analysis_mode: str = Field(default="structured", env="ANALYSIS_MODE")
+
+    # === Extraction PDF ===
+    pdf_extraction_workers: int = Field(default=2, env="PDF_EXTRACTION_WORKERS")
+    pdf_parallel_page_threshold: int = Field(default=20, env="PDF_PARALLEL_PAGE_THRESHOLD")
+    pdf_text_cache_enabled: bool = Field(default=True, env="PDF_TEXT_CACHE_ENABLED")
+    pdf_text_cache_file: str = Field(default="offres/.cache/pdf_text.sqlite3", env="PDF_TEXT_CACHE_FILE")
+
+    # === Cache des analyses ===
+    analysis_cache_enabled: bool = Field(default=True, env="ANALYSIS_CACHE_ENABLED")
+    analysis_cache_dir: str = Field(default="offres/offer_analysis/.cache", env="ANALYSIS_CACHE_DIR")
+    analysis_cache_max_size_mb: float = Field(default=50.0, env="ANALYSIS_CACHE_MAX_SIZE_MB")
+    analysis_cache_max_age_days: float = Field(default=30.0, env="ANALYSIS_CACHE_MAX_AGE_DAYS")
+
+    # === Cache des réponses de l'API ===
+    # Étapes mises en cache (par défaut analyse et thèmes). Ces appels ne sont pas à
+    # température 0: le cache fige le premier tirage obtenu pour une requête donnée
+    response_cache_enabled: bool = Field(default=True, env="RESPONSE_CACHE_ENABLED")
+    response_cache_file: str = Field(default="offres/.cache/responses.sqlite3", env="RESPONSE_CACHE_FILE")
+    response_cache_stages: str = Field(default="analysis,themes", env="RESPONSE_CACHE_STAGES")
+    response_cache_max_size_mb: float = Field(default=100.0, env="RESPONSE_CACHE_MAX_SIZE_MB")
+    response_cache_max_age_days: float = Field(default=30.0, env="RESPONSE_CACHE_MAX_AGE_DAYS")
+
+    # === Contexte de génération du CV ===
+    cv_context_token_budget: int = Field(default=6000, env="CV_CONTEXT_TOKEN_BUDGET")
+    cv_context_snippet_tokens: int = Field(default=250, env="CV_CONTEXT_SNIPPET_TOKENS")
+    cv_context_top_k: int = Field(default=20, env="CV_CONTEXT_TOP_K")
+    text_index_file: str = Field(default="data/.cache/text_index.json", env="TEXT_INDEX_FILE")
 
     # === Logging ===
     log_level: str = Field(default="INFO", env="LOG_LEVEL")
@@ -46,6 +113,10 @@ class Settings(BaseSettings):
     # === Génération ===
     pdf_quality: str = Field(default="high", env="PDF_QUALITY")
 
+    # === Concurrence ===
+    max_concurrent_offers: int = Field(default=4, env="MAX_CONCURRENT_OFFERS")
+    max_concurrent_llm_calls: int = Field(default=4, env="MAX_CONCURRENT_LLM_CALLS")
+
 
 # Instance globale de la configuration
 settings = Settings()
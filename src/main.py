@@ -5,11 +5,13 @@ Orchestrateur Principal - Génération CV & Lettre de Motivation
 Traite les offres d'emploi et génère automatiquement CV PDF et Lettre MD
 """
 
+import argparse
 import json
 import os
 import sys
+import traceback
 from pathlib import Path
-from typing import List, Dict, Tuple
+from typing import Awaitable, Callable, List, Dict, Tuple
 import asyncio
 import aiofiles
 
@@ -25,6 +27,15 @@ sys.path.insert(0, str(BASE_DIR / "src"))
 from agents.offer_analyzer import OfferAnalyzer
 from agents.cv_generator import CVGenerator
 from agents.letter_generator import LetterGenerator
+from utils.openrouter_client import get_openrouter_client
+from utils.analysis_cache import AnalysisCache
+from utils.pdf_extraction import shutdown_pdf_executor
+from utils.pdf_text_cache import PdfTextCache
+from utils.response_cache import ResponseCache
+from utils.reactive_resume_client import ReactiveResumeClient
+from utils.text_index import TextIndex
+from utils.bm25 import BM25Ranker
+from utils.job_store import JobStore, STAGES, STAGE_DONE, STAGE_DEPENDENCIES, downstream_stages
 from config.settings import settings
 
 # Constants - Utilisation de la configuration centralisée
@@ -32,20 +43,57 @@ OFFRES_FILE = BASE_DIR / settings.offres_file
 OUTPUTS_DIR = BASE_DIR / settings.outputs_dir
 ANALYSIS_DIR = BASE_DIR / settings.analysis_dir
 DATA_DIR = BASE_DIR / settings.data_dir
+ANALYSIS_CACHE_DIR = BASE_DIR / settings.analysis_cache_dir
+PDF_TEXT_CACHE_FILE = BASE_DIR / settings.pdf_text_cache_file
+RESPONSE_CACHE_FILE = BASE_DIR / settings.response_cache_file
+JOB_STORE_FILE = BASE_DIR / settings.job_store_file
+TEXT_INDEX_FILE = BASE_DIR / settings.text_index_file
+CHECKPOINT_DIR = OUTPUTS_DIR / ".checkpoints"
 
 class CVGeneratorOrchestrator:
     """Orchestrateur principal pour la génération de CV et lettres de motivation"""
 
-    def __init__(self):
+    def __init__(self, use_cache: bool = True, from_stage: str = None):
+        """
+        Args:
+            use_cache: Réutiliser les analyses et réponses en cache (désactivé par --no-cache)
+            from_stage: Étape à partir de laquelle tout est régénéré (--from-stage)
+        """
         self.offers_data = {}
         self.offer_analysis_results = {}
+        self.offer_results = {}
         self.identity_context = {}
         self.education_context = {}
 
-        # Initialisation des agents
-        self.offer_analyzer = OfferAnalyzer()
-        self.cv_generator = CVGenerator()
-        self.letter_generator = LetterGenerator()
+        # Initialisation des agents (client OpenRouter partagé)
+        self.openrouter = get_openrouter_client()
+        analysis_cache = None
+        if use_cache and settings.analysis_cache_enabled:
+            analysis_cache = AnalysisCache(
+                ANALYSIS_CACHE_DIR,
+                max_size_mb=settings.analysis_cache_max_size_mb,
+                max_age_days=settings.analysis_cache_max_age_days
+            )
+        if use_cache and settings.response_cache_enabled:
+            self.openrouter.response_cache = ResponseCache(
+                RESPONSE_CACHE_FILE,
+                max_size_mb=settings.response_cache_max_size_mb,
+                max_age_days=settings.response_cache_max_age_days
+            )
+        text_cache = PdfTextCache(PDF_TEXT_CACHE_FILE) if settings.pdf_text_cache_enabled else None
+        self.offer_analyzer = OfferAnalyzer(self.openrouter, cache=analysis_cache, text_cache=text_cache)
+        self.text_index = TextIndex(TEXT_INDEX_FILE)
+        self.cv_generator = CVGenerator(self.openrouter)
+        self.letter_generator = LetterGenerator(self.openrouter)
+
+        # Limite du nombre d'offres simultanées; celle des appels IA est ajustée
+        # par le client OpenRouter selon les 429 reçus, celles des imports et
+        # impressions PDF sont tenues par le client Reactive Resume
+        self.offer_semaphore = asyncio.Semaphore(max(1, settings.max_concurrent_offers))
+
+        # État des offres et des étapes (SQLite, exporté vers offres.json en fin d'exécution)
+        self.job_store = JobStore(JOB_STORE_FILE)
+        self.forced_stages = set(downstream_stages(from_stage)) if from_stage else set()
 
     async def load_offers(self) -> Dict:
         """Charge les offres depuis offres.json"""
@@ -70,8 +118,9 @@ class CVGeneratorOrchestrator:
                 print(f"  ⚠️ Fichier non trouvé: {file_path}")
 
     async def load_education_data(self):
-        """Charge les données d'éducation"""
+        """Charge les données d'éducation et met à jour l'index de recherche"""
         print("🎓 Chargement des données d'éducation...")
+        indexed_files = {}
         # Parcourir bio/ et info/
         for subdir in ['bio', 'info']:
             dir_path = DATA_DIR / "education" / subdir
@@ -80,11 +129,37 @@ class CVGeneratorOrchestrator:
                     async with aiofiles.open(file_path, 'r') as f:
                         content = await f.read()
                         self.education_context[f"{subdir}/{file_path.stem}"] = content
+                        indexed_files[f"{subdir}/{file_path.stem}"] = (file_path, content)
+
+        # Les fichiers d'identité sont indexés sous "identity/<nom>"
+        for key, content in self.identity_context.items():
+            indexed_files[f"identity/{key}"] = (DATA_DIR / "identity" / f"{key}.md", content)
+
+        # Seuls les fichiers modifiés depuis la dernière exécution sont ré-analysés
+        reindexed = 0
+        for doc_id, (file_path, content) in indexed_files.items():
+            if self.text_index.refresh(doc_id, file_path, content):
+                reindexed += 1
+        self.text_index.prune(indexed_files)
+        await asyncio.to_thread(self.text_index.save)
+        print(f"  🔎 Index: {len(indexed_files)} document(s), {reindexed} ré-indexé(s)")
+
+        # Classement BM25 des paragraphes d'éducation et de l'expérience professionnelle
+        ranked_texts = {
+            doc_id: content for doc_id, (_, content) in indexed_files.items()
+            if doc_id != "identity/personnal"
+        }
+        self.cv_generator.ranker = BM25Ranker(self.text_index, ranked_texts)
 
     async def process_offer(self, offer_name: str, offer_path: str) -> bool:
         """
         Traite une offre complète : analyse + génération CV + lettre
 
+        Graphe de dépendances:
+            analyse → thèmes → {CV JSON → PDF, lettre}
+        Les deux branches s'exécutent en parallèle; si l'une échoue, le
+        résultat de l'autre est conservé dans offer_results.
+
         Returns:
             True si succès, False sinon
         """
@@ -93,99 +168,253 @@ class CVGeneratorOrchestrator:
         print(f"{'='*60}")
 
         try:
+            # Reprise: les étapes déjà terminées ne sont pas refaites
+            checkpoints = await self.load_checkpoints(offer_name)
+            if checkpoints:
+                print(f"  ♻️ Étapes reprises depuis le dernier point de contrôle: {', '.join(checkpoints)}")
+
             # 1. Extraction et analyse de l'offre
-            analysis_result = await self.analyze_offer(offer_name, offer_path)
+            analysis_result = await self.analyze_offer(offer_name, offer_path, checkpoints)
             offer_analysis = analysis_result['analysis']
             themes = analysis_result['themes']
 
-            # 2. Génération du CV (JSON + PDF)
-            cv_json = await self.generate_cv_json(offer_name, offer_analysis, themes)
-            cv_path = await self.send_to_reactive_resume(cv_json, offer_name)
+            # 2. Branches indépendantes: CV (JSON + PDF) et lettre de motivation
+            cv_result, letter_result = await asyncio.gather(
+                self.generate_cv(offer_name, offer_analysis, themes, checkpoints),
+                self.generate_cover_letter(offer_name, offer_analysis, themes, checkpoints),
+                return_exceptions=True
+            )
+
+            # Conservation des résultats partiels
+            outputs = {'cv': None, 'letter': None, 'errors': {}}
+            for branch, result in (('cv', cv_result), ('letter', letter_result)):
+                if isinstance(result, asyncio.CancelledError):
+                    raise result
+                if isinstance(result, BaseException):
+                    outputs['errors'][branch] = str(result)
+                    print(f"\n❌ Branche '{branch}' en échec pour {offer_name}: {str(result)}")
+                    traceback.print_exception(type(result), result, result.__traceback__)
+                else:
+                    outputs[branch] = result
+            self.offer_results[offer_name] = outputs
 
-            # 3. Génération de la lettre de motivation
-            letter_path = await self.generate_cover_letter(offer_name, offer_analysis, themes)
+            if outputs['errors']:
+                print(f"\n⚠️ Offre {offer_name} partiellement traitée")
+                print(f"   📄 CV: {outputs['cv'] or 'échec'}")
+                print(f"   📝 Lettre: {outputs['letter'] or 'échec'}")
+                return False
 
             print(f"\n✅ Offre {offer_name} traitée!")
-            print(f"   📄 CV: {cv_path}")
-            print(f"   📝 Lettre: {letter_path}")
+            print(f"   📄 CV: {outputs['cv']}")
+            print(f"   📝 Lettre: {outputs['letter']}")
 
             return True
 
         except Exception as e:
             print(f"\n❌ Erreur lors du traitement de {offer_name}: {str(e)}")
-            # Import manquant dans certains contextes
-            try:
-                import traceback
-                traceback.print_exc()
-            except:
-                pass
+            traceback.print_exc()
             return False
 
-    async def analyze_offer(self, offer_name: str, offer_path: str) -> Dict:
+    async def process_offer_bounded(self, offer_name: str, offer_path: str) -> bool:
+        """
+        Traite une offre dans la limite de concurrence configurée
+
+        Une erreur sur une offre (y compris lors de la mise à jour du statut)
+        n'interrompt jamais le traitement des autres offres.
+
+        Returns:
+            True si succès, False sinon
+        """
+        async with self.offer_semaphore:
+            success = await self.process_offer(offer_name, offer_path)
+
+        if success:
+            try:
+                await self.update_offer_status(offer_name, True)
+            except Exception as e:
+                print(f"⚠️ Statut de {offer_name} non sauvegardé: {str(e)}")
+
+        return success
+
+    async def load_checkpoints(self, offer_name: str) -> Dict[str, str]:
+        """
+        Sorties réutilisables des étapes déjà terminées d'une offre
+
+        Une étape est reprise si elle est terminée, que sa sortie existe
+        toujours, qu'elle n'est pas forcée par --from-stage et que toutes
+        ses dépendances sont elles-mêmes reprises. Un CV sauvegardé en JSON
+        faute de Reactive Resume n'est pas considéré comme un PDF.
+
+        Returns:
+            {étape: chemin de la sortie}
+        """
+        stages = await asyncio.to_thread(self.job_store.stages, offer_name)
+
+        checkpoints = {}
+        for stage in STAGES:
+            info = stages.get(stage)
+            if not info or info['status'] != STAGE_DONE or not info['output']:
+                continue
+            if stage in self.forced_stages or not Path(info['output']).exists():
+                continue
+            if stage == "pdf" and not info['output'].endswith('.pdf'):
+                continue
+            if all(dep in checkpoints for dep in STAGE_DEPENDENCIES[stage]):
+                checkpoints[stage] = info['output']
+        return checkpoints
+
+    async def analyze_offer(self, offer_name: str, offer_path: str, checkpoints: Dict[str, str] = None) -> Dict:
         """Analyse complète d'une offre d'emploi"""
+        checkpoints = checkpoints or {}
         print(f"\n🔍 Analyse de l'offre: {offer_name}")
 
-        result = await self.offer_analyzer.analyze_offer(
-            offer_name,
-            offer_path,
-            ANALYSIS_DIR
+        if "analysis" in checkpoints:
+            result = await self.resume_analysis(offer_name, checkpoints)
+            self.offer_analysis_results[offer_name] = result
+            return result
+
+        result = await self.run_stage(
+            offer_name, "analysis",
+            self.offer_analyzer.analyze_offer(
+                offer_name, offer_path, ANALYSIS_DIR,
+                force="analysis" in self.forced_stages
+            ),
+            output_of=lambda r: r['output_file']
         )
 
+        # Les thèmes sont produits avec l'analyse et persistés à côté
+        themes_file = self.offer_analyzer.themes_file(offer_name, ANALYSIS_DIR)
+        await asyncio.to_thread(self.job_store.finish_stage, offer_name, "themes", str(themes_file))
+
         # Stockage des résultats
         self.offer_analysis_results[offer_name] = result
 
         return result
 
+    async def resume_analysis(self, offer_name: str, checkpoints: Dict[str, str]) -> Dict:
+        """Recharge l'analyse terminée et, si nécessaire, refait uniquement les thèmes"""
+        analysis_file = checkpoints["analysis"]
+        async with aiofiles.open(analysis_file, 'r', encoding='utf-8') as f:
+            analysis = await f.read()
+
+        if "themes" in checkpoints:
+            async with aiofiles.open(checkpoints["themes"], 'r', encoding='utf-8') as f:
+                themes = json.loads(await f.read())['themes']
+        else:
+            themes = await self.run_stage(
+                offer_name, "themes",
+                self.offer_analyzer.extract_themes(
+                    offer_name, analysis, ANALYSIS_DIR,
+                    force="themes" in self.forced_stages
+                ),
+                output_of=lambda _: str(self.offer_analyzer.themes_file(offer_name, ANALYSIS_DIR))
+            )
+
+        return {'analysis': analysis, 'themes': themes, 'output_file': analysis_file}
+
+    def cv_checkpoint_path(self, offer_name: str) -> Path:
+        """Chemin du point de contrôle du CV JSON d'une offre"""
+        return CHECKPOINT_DIR / f"{offer_name}_cv.json"
+
     async def generate_cv_json(self, offer_name: str, offer_analysis: str, themes: list) -> Dict:
         """Génère le CV au format JSON Reactive Resume"""
         print(f"\n📋 Génération du CV pour: {offer_name}")
 
-        cv_json = await self.cv_generator.generate_cv_json(
-            offer_analysis=offer_analysis,
-            identity_context=self.identity_context,
-            education_context=self.education_context,
-            themes=themes
+        async def generate_and_checkpoint() -> Dict:
+            cv_json = await self.cv_generator.generate_cv_json(
+                offer_analysis=offer_analysis,
+                identity_context=self.identity_context,
+                education_context=self.education_context,
+                themes=themes
+            )
+            CHECKPOINT_DIR.mkdir(parents=True, exist_ok=True)
+            async with aiofiles.open(self.cv_checkpoint_path(offer_name), 'w', encoding='utf-8') as f:
+                await f.write(json.dumps(cv_json, indent=2, ensure_ascii=False))
+            return cv_json
+
+        cv_json = await self.run_stage(
+            offer_name, "cv_json",
+            generate_and_checkpoint(),
+            output_of=lambda _: str(self.cv_checkpoint_path(offer_name))
         )
 
         return cv_json
 
+    async def generate_cv(self, offer_name: str, offer_analysis: str, themes: list, checkpoints: Dict[str, str] = None) -> str:
+        """Branche CV du graphe: génération du JSON puis rendu PDF"""
+        checkpoints = checkpoints or {}
+        if "pdf" in checkpoints:
+            print(f"\n♻️ CV déjà généré pour {offer_name}: {checkpoints['pdf']}")
+            return checkpoints["pdf"]
+
+        if "cv_json" in checkpoints:
+            print(f"\n♻️ CV JSON repris pour {offer_name}: {checkpoints['cv_json']}")
+            async with aiofiles.open(checkpoints["cv_json"], 'r', encoding='utf-8') as f:
+                cv_json = json.loads(await f.read())
+        else:
+            cv_json = await self.generate_cv_json(offer_name, offer_analysis, themes)
+
+        return await self.send_to_reactive_resume(cv_json, offer_name)
+
     async def send_to_reactive_resume(self, cv_json: Dict, offer_name: str) -> str:
         """Envoie le JSON à Reactive Resume et récupère le PDF"""
         print(f"\n📤 Envoi à Reactive Resume...")
 
-        pdf_path = await self.cv_generator.send_to_reactive_resume(cv_json, offer_name)
-        return pdf_path
+        return await self.run_stage(
+            offer_name, "pdf",
+            self.cv_generator.send_to_reactive_resume(cv_json, offer_name),
+            output_of=str
+        )
 
-    async def generate_cover_letter(self, offer_name: str, offer_analysis: str, themes: list) -> str:
+    async def generate_cover_letter(self, offer_name: str, offer_analysis: str, themes: list, checkpoints: Dict[str, str] = None) -> str:
         """Génère la lettre de motivation"""
+        if checkpoints and "letter" in checkpoints:
+            print(f"\n♻️ Lettre déjà générée pour {offer_name}: {checkpoints['letter']}")
+            return checkpoints["letter"]
+
         print(f"\n✍️ Génération de la lettre de motivation pour: {offer_name}")
 
-        letter_path = await self.letter_generator.generate_letter(
-            offer_analysis=offer_analysis,
-            identity_context=self.identity_context,
-            themes=themes,
-            offer_name=offer_name
+        letter_path = await self.run_stage(
+            offer_name, "letter",
+            self.letter_generator.generate_letter(
+                offer_analysis=offer_analysis,
+                identity_context=self.identity_context,
+                themes=themes,
+                offer_name=offer_name
+            ),
+            output_of=str
         )
 
         return letter_path
 
-    async def update_offer_status(self, offer_name: str, processed: bool):
-        """Met à jour le statut de l'offre dans offres.json"""
-        print(f"\n🔄 Mise à jour du statut de {offer_name}: {processed}")
+    async def run_stage(self, offer_name: str, stage: str, operation: Awaitable, output_of: Callable = None):
+        """
+        Exécute une étape en enregistrant son statut, sa durée et son erreur
 
-        # Lecture du fichier actuel
-        async with aiofiles.open(OFFRES_FILE, 'r') as f:
-            content = await f.read()
-            data = json.loads(content)
+        Args:
+            offer_name: Nom de l'offre
+            stage: Nom de l'étape (analysis, cv_json, pdf, letter)
+            operation: Coroutine de l'étape
+            output_of: Extrait du résultat la sortie à enregistrer (ex: chemin)
 
-        # Mise à jour
-        if offer_name in data:
-            path, _ = data[offer_name]
-            data[offer_name] = [path, processed]
+        Returns:
+            Résultat de l'étape
+        """
+        await asyncio.to_thread(self.job_store.start_stage, offer_name, stage)
+        try:
+            result = await operation
+        except Exception as e:
+            await asyncio.to_thread(self.job_store.fail_stage, offer_name, stage, str(e))
+            raise
 
-            # Sauvegarde
-            async with aiofiles.open(OFFRES_FILE, 'w') as f:
-                await f.write(json.dumps(data, indent=2, ensure_ascii=False))
+        output = output_of(result) if output_of else None
+        await asyncio.to_thread(self.job_store.finish_stage, offer_name, stage, output)
+        return result
+
+    async def update_offer_status(self, offer_name: str, processed: bool):
+        """Met à jour le statut de l'offre (exporté vers offres.json en fin d'exécution)"""
+        print(f"\n🔄 Mise à jour du statut de {offer_name}: {processed}")
+        await asyncio.to_thread(self.job_store.set_processed, offer_name, processed)
 
     async def check_reactive_resume(self):
         """Vérifie que Reactive Resume est accessible"""
@@ -200,13 +429,20 @@ class CVGeneratorOrchestrator:
             print(f"  💡 Démarrez avec: docker-compose up -d")
             raise ConnectionError("Reactive Resume n'est pas accessible")
 
+    async def close(self):
+        """Libère les ressources partagées (pools HTTP, pool d'extraction PDF)"""
+        await self.openrouter.close()
+        await self.cv_generator.reactive_client.close()
+        shutdown_pdf_executor()
+
     async def run(self):
         """Exécute le pipeline complet"""
         print("🚀 Démarrage de l'orchestrateur CV & Lettre de Motivation")
         print("="*60)
 
-        # Chargement des données
-        self.offers_data = await self.load_offers()
+        # Chargement des données (offres.json → état persistant)
+        await asyncio.to_thread(self.job_store.sync_offers, await self.load_offers())
+        self.offers_data = await asyncio.to_thread(self.job_store.offers)
         await self.load_identity_data()
         await self.load_education_data()
 
@@ -214,31 +450,137 @@ class CVGeneratorOrchestrator:
         await self.check_reactive_resume()
 
         # Traitement des offres non traitées
-        processed_count = 0
-        failed_count = 0
-
+        pending = []
         for offer_name, (offer_path, is_processed) in self.offers_data.items():
             if not is_processed:
-                success = await self.process_offer(offer_name, offer_path)
-                if success:
-                    processed_count += 1
-                    await self.update_offer_status(offer_name, True)
-                else:
-                    failed_count += 1
-                    print(f"⚠️ Échec du traitement de {offer_name}")
+                pending.append((offer_name, offer_path))
             else:
                 print(f"⏭️ Offre {offer_name} déjà traitée, ignorée")
 
+        print(f"\n⚙️ {len(pending)} offre(s) à traiter "
+              f"(concurrence: {settings.max_concurrent_offers} offre(s), "
+              f"{settings.max_concurrent_llm_calls} appel(s) IA)")
+
+        try:
+            results = await asyncio.gather(
+                *(self.process_offer_bounded(name, path) for name, path in pending),
+                return_exceptions=True
+            )
+        finally:
+            # Une seule réécriture de offres.json, même en cas d'interruption
+            await asyncio.to_thread(self.job_store.export_json, OFFRES_FILE)
+            if self.offer_analyzer.cache is not None:
+                await asyncio.to_thread(self.offer_analyzer.cache.flush)
+
+        processed_count = 0
+        failed_count = 0
+        for (offer_name, _), success in zip(pending, results):
+            if success is True:
+                processed_count += 1
+            else:
+                failed_count += 1
+                print(f"⚠️ Échec du traitement de {offer_name}")
+
         print(f"\n{'='*60}")
         print(f"✅ Pipeline terminé:")
         print(f"   {processed_count} offre(s) traitée(s) avec succès")
         print(f"   {failed_count} offre(s) en échec")
+
+        readiness = self.cv_generator.reactive_client.readiness_stats()
+        if readiness:
+            print(f"   ⏱️ Disponibilité Reactive Resume: p50 {readiness['p50']:.2f}s, "
+                  f"p90 {readiness['p90']:.2f}s, max {readiness['max']:.2f}s "
+                  f"({readiness['count']} CV)")
+        ttft = self.openrouter.ttft_stats()
+        if ttft:
+            print(f"   ⏱️ Premier token OpenRouter: p50 {ttft['p50']:.2f}s, "
+                  f"p90 {ttft['p90']:.2f}s, max {ttft['max']:.2f}s "
+                  f"({ttft['count']} appel(s) en streaming)")
+        limiter = self.openrouter.concurrency.stats()
+        if limiter['requests']:
+            print(f"   🚦 OpenRouter: {limiter['requests']} appel(s), {limiter['rate_limited']} refus 429, "
+                  f"{limiter['errors']} erreur(s) serveur, concurrence finale {limiter['limit']}")
+        if self.openrouter.response_cache is not None:
+            cache = await asyncio.to_thread(self.openrouter.response_cache.stats)
+            if cache['hits'] or cache['misses']:
+                print(f"   💾 Cache des réponses: {cache['hits']} réutilisée(s), {cache['misses']} absente(s) "
+                      f"({cache['entries']} entrées, {cache['size_mb']:.1f} Mo)")
+        hedges = self.openrouter.hedge_stats
+        if hedges['launched']:
+            print(f"   🪂 Appels doublés: {hedges['launched']}/{hedges['eligible']} "
+                  f"(copie plus rapide: {hedges['won']})")
+        for stage, models in sorted(self.openrouter.router.stats().items(), key=lambda item: str(item[0])):
+            details = ", ".join(
+                f"{model} {info['calls']} ok/{info['failures']} échec(s)"
+                + (f" ~{info['latency']:.1f}s" if info['latency'] is not None else "")
+                for model, info in models.items()
+            )
+            print(f"   🧭 {stage}: {details}")
         print(f"{'='*60}")
 
+def parse_args() -> argparse.Namespace:
+    """Analyse les arguments de la ligne de commande"""
+    parser = argparse.ArgumentParser(description="Génération de CV et lettres de motivation")
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Ignore les caches des analyses et des réponses de l'API, et ré-analyse toutes les offres"
+    )
+    parser.add_argument(
+        "--from-stage",
+        choices=STAGES,
+        help="Régénère l'étape donnée et celles qui en dépendent, au lieu de reprendre "
+             "les étapes déjà terminées des offres à traiter"
+    )
+    parser.add_argument(
+        "--gc-resumes",
+        action="store_true",
+        help="Supprime de Reactive Resume les CV générés par le pipeline, puis quitte"
+    )
+    parser.add_argument(
+        "--gc-older-than",
+        type=float,
+        default=0,
+        metavar="JOURS",
+        help="Avec --gc-resumes: ne supprime que les CV plus anciens (défaut: tous)"
+    )
+    parser.add_argument(
+        "--gc-legacy",
+        action="store_true",
+        help="Avec --gc-resumes: inclut les CV des versions précédentes (slugs cv-<timestamp>)"
+    )
+    return parser.parse_args()
+
+
+async def collect_generated_resumes(older_than_days: float, include_legacy: bool = False):
+    """Supprime les resumes générés par le pipeline sur Reactive Resume"""
+    print("🧹 Nettoyage des CV générés sur Reactive Resume...")
+    async with ReactiveResumeClient(
+        timeout=settings.reactive_resume_timeout,
+        max_retries=settings.reactive_resume_max_retries,
+        registry_path=BASE_DIR / settings.resume_registry_file
+    ) as client:
+        # Les resumes réutilisés par offre (registre) sont conservés
+        deleted = await client.garbage_collect(
+            older_than_days=older_than_days,
+            keep_ids=client.registered_ids(),
+            include_legacy=include_legacy
+        )
+    print(f"✅ {deleted} CV supprimé(s)")
+
+
 async def main():
     """Point d'entrée principal"""
-    orchestrator = CVGeneratorOrchestrator()
-    await orchestrator.run()
+    args = parse_args()
+    if args.gc_resumes:
+        await collect_generated_resumes(args.gc_older_than, include_legacy=args.gc_legacy)
+        return
+
+    orchestrator = CVGeneratorOrchestrator(use_cache=not args.no_cache, from_stage=args.from_stage)
+    try:
+        await orchestrator.run()
+    finally:
+        await orchestrator.close()
 
 if __name__ == "__main__":
     asyncio.run(main())
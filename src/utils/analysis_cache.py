@@ -0,0 +1,218 @@
+"""
+Cache adressé par contenu pour les analyses d'offres
+Évite de ré-analyser une offre dont le PDF, le prompt et le modèle sont inchangés
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def hash_bytes(*parts: bytes) -> str:
+    """Retourne l'empreinte SHA-256 hexadécimale de la concaténation des parties"""
+    digest = hashlib.sha256()
+    for part in parts:
+        # Séparateur de longueur pour éviter les collisions par concaténation
+        digest.update(len(part).to_bytes(8, 'big'))
+        digest.update(part)
+    return digest.hexdigest()
+
+
+class AnalysisCache:
+    """
+    Cache disque des analyses d'offres
+
+    Chaque entrée est identifiée par le hash (PDF, prompt d'analyse, modèle).
+    Le contenu markdown est stocké dans `<clé>.md`; l'index `index.json`
+    conserve les thèmes et les métadonnées nécessaires à l'éviction
+    (taille, date de création, dernier accès).
+
+    Politique d'éviction:
+    - les entrées plus anciennes que max_age_days sont supprimées
+    - au-delà de max_size_mb, les entrées les moins récemment utilisées
+      sont supprimées en premier
+
+    Un succès ne met à jour le dernier accès qu'en mémoire; l'index est
+    écrit lors d'un ajout ou d'une éviction, et par flush() en fin
+    d'exécution.
+
+    Les méthodes sont synchrones (et protégées par un verrou): les appeler
+    via asyncio.to_thread depuis du code asynchrone.
+    """
+
+    def __init__(self, cache_dir: Path, max_size_mb: float = 50.0, max_age_days: float = 30.0):
+        """
+        Initialise le cache
+
+        Args:
+            cache_dir: Dossier du cache (créé si nécessaire)
+            max_size_mb: Taille totale maximale des analyses stockées
+            max_age_days: Âge maximal d'une entrée (0 = illimité)
+        """
+        self.cache_dir = Path(cache_dir)
+        self.index_file = self.cache_dir / "index.json"
+        self.max_size_bytes = int(max_size_mb * 1024 * 1024)
+        self.max_age_seconds = max_age_days * 86400
+        self._index: Optional[Dict[str, Dict[str, Any]]] = None
+        # Derniers accès modifiés depuis la dernière écriture de l'index
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def compute_key(pdf_bytes: bytes, prompt: str, model: str, themes_model: str = "") -> str:
+        """
+        Calcule la clé d'une analyse
+
+        Args:
+            pdf_bytes: Contenu brut du PDF de l'offre
+            prompt: Prompt d'analyse utilisé
+            model: Modèle utilisé pour l'analyse
+            themes_model: Modèle d'extraction des thèmes (mode en deux appels)
+
+        Returns:
+            Clé hexadécimale SHA-256
+        """
+        return hash_bytes(
+            pdf_bytes, prompt.encode('utf-8'), model.encode('utf-8'), themes_model.encode('utf-8')
+        )
+
+    def _load_index(self) -> Dict[str, Dict[str, Any]]:
+        """Charge l'index depuis le disque (une seule fois)"""
+        if self._index is None:
+            self._index = {}
+            if self.index_file.exists():
+                try:
+                    with open(self.index_file, 'r', encoding='utf-8') as f:
+                        self._index = json.load(f)
+                except (OSError, json.JSONDecodeError) as e:
+                    logger.warning(f"Index du cache illisible, réinitialisation: {e}")
+        return self._index
+
+    def _save_index(self):
+        """Écrit l'index de manière atomique (fichier temporaire + rename)"""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.index_file.with_suffix('.json.tmp')
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(self._load_index(), f, indent=2, ensure_ascii=False)
+        os.replace(tmp_file, self.index_file)
+        self._dirty = False
+
+    def flush(self):
+        """Écrit l'index si des dates de dernier accès n'ont pas encore été persistées"""
+        with self._lock:
+            if self._dirty:
+                self._save_index()
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.md"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Recherche une analyse dans le cache
+
+        Args:
+            key: Clé calculée par compute_key
+
+        Returns:
+            {'analysis': str, 'themes': list} ou None si absente/expirée
+        """
+        with self._lock:
+            return self._get(key)
+
+    def _get(self, key: str) -> Optional[Dict[str, Any]]:
+        index = self._load_index()
+        entry = index.get(key)
+        if entry is None:
+            return None
+
+        entry_path = self._entry_path(key)
+        expired = self.max_age_seconds and time.time() - entry['created_at'] > self.max_age_seconds
+        if expired or not entry_path.exists():
+            self._remove(key)
+            self._save_index()
+            return None
+
+        with open(entry_path, 'r', encoding='utf-8') as f:
+            analysis = f.read()
+
+        entry['last_access'] = time.time()
+        self._dirty = True
+
+        return {
+            'analysis': analysis,
+            'themes': entry.get('themes', [])
+        }
+
+    def put(self, key: str, offer_name: str, analysis: str, themes: list):
+        """
+        Enregistre une analyse puis applique la politique d'éviction
+
+        Args:
+            key: Clé calculée par compute_key
+            offer_name: Nom de l'offre (informatif)
+            analysis: Analyse markdown
+            themes: Thèmes extraits
+        """
+        with self._lock:
+            self._put(key, offer_name, analysis, themes)
+
+    def _put(self, key: str, offer_name: str, analysis: str, themes: list):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        entry_path = self._entry_path(key)
+        with open(entry_path, 'w', encoding='utf-8') as f:
+            f.write(analysis)
+
+        now = time.time()
+        self._load_index()[key] = {
+            'offer_name': offer_name,
+            'themes': themes,
+            'size': entry_path.stat().st_size,
+            'created_at': now,
+            'last_access': now
+        }
+        self.evict()
+        self._save_index()
+
+    def evict(self) -> int:
+        """
+        Applique la politique d'éviction (âge puis taille, LRU)
+
+        Returns:
+            Nombre d'entrées supprimées
+        """
+        index = self._load_index()
+        now = time.time()
+        removed = 0
+
+        if self.max_age_seconds:
+            for key in [k for k, e in index.items() if now - e['created_at'] > self.max_age_seconds]:
+                self._remove(key)
+                removed += 1
+
+        total_size = sum(e.get('size', 0) for e in index.values())
+        if total_size > self.max_size_bytes:
+            for key in sorted(index, key=lambda k: index[k]['last_access']):
+                if total_size <= self.max_size_bytes:
+                    break
+                total_size -= index[key].get('size', 0)
+                self._remove(key)
+                removed += 1
+
+        if removed:
+            logger.info(f"Cache d'analyses: {removed} entrée(s) évincée(s)")
+        return removed
+
+    def _remove(self, key: str):
+        """Supprime une entrée de l'index et du disque"""
+        self._load_index().pop(key, None)
+        try:
+            self._entry_path(key).unlink()
+        except FileNotFoundError:
+            pass
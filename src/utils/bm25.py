@@ -0,0 +1,177 @@
+"""
+Classement BM25 des paragraphes d'éducation et d'expérience
+Aucun modèle ni appel réseau: les statistiques viennent de l'index texte
+"""
+
+import heapq
+import logging
+import math
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from utils.text_index import TextIndex, split_paragraphs, tokenize
+
+logger = logging.getLogger(__name__)
+
+# Paramètres BM25 usuels (saturation de la fréquence, normalisation par la longueur)
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# Poids d'un terme de la requête selon sa provenance
+THEME_WEIGHT = 1.0
+ANALYSIS_WEIGHT = 0.25
+
+
+def build_query(themes: List[str], analysis: str = "") -> Dict[str, float]:
+    """
+    Construit la requête pondérée à partir des thèmes et de l'analyse
+
+    Les thèmes sont prioritaires; les termes de l'analyse complètent la
+    requête avec un poids réduit (une seule fois par terme).
+
+    Returns:
+        {terme: poids}
+    """
+    query: Dict[str, float] = {}
+    for theme in themes:
+        for term in tokenize(theme):
+            query[term] = query.get(term, 0) + THEME_WEIGHT
+    for term in set(tokenize(analysis)):
+        query[term] = query.get(term, 0) + ANALYSIS_WEIGHT
+    return query
+
+
+class BM25Ranker:
+    """
+    Classe des paragraphes ("chunks") par score BM25
+
+    Construit à partir d'un TextIndex (fréquences par paragraphe, longueurs)
+    et des textes correspondants. Les postings sont convertis une fois en
+    tableaux NumPy: le score d'une requête est une somme vectorisée sur les
+    seuls paragraphes contenant ses termes. Sans NumPy, le même calcul est
+    fait en Python pur.
+
+    Usage:
+        ranker = BM25Ranker(index, texts)
+        for doc_id, para, text, score in ranker.top_k(build_query(themes, analysis), k=20):
+            ...
+    """
+
+    def __init__(self, index: TextIndex, texts: Dict[str, str]):
+        """
+        Args:
+            index: Index texte à jour pour les documents de `texts`
+            texts: Documents à classer {identifiant: texte}
+        """
+        self.chunks: List[Tuple[str, int]] = []
+        self.chunk_texts: List[str] = []
+        lengths = []
+        chunk_ids: Dict[Tuple[str, int], int] = {}
+
+        for doc_id, text in texts.items():
+            entry = index.documents.get(doc_id)
+            if entry is None:
+                continue
+            paragraphs = split_paragraphs(text)
+            if len(paragraphs) != len(entry["paragraphs"]):
+                logger.warning(f"Index désynchronisé pour {doc_id}, document ignoré")
+                continue
+            for para_num, paragraph in enumerate(paragraphs):
+                chunk_ids[(doc_id, para_num)] = len(self.chunks)
+                self.chunks.append((doc_id, para_num))
+                self.chunk_texts.append(paragraph)
+                lengths.append(entry["paragraphs"][para_num])
+
+        count = len(self.chunks)
+        avg_length = (sum(lengths) / count) if count else 0.0
+
+        # Par terme: indices des paragraphes et composante BM25 (idf × tf saturée)
+        self.postings: Dict[str, Tuple[List[int], List[float]]] = {}
+        for term, docs in index.postings.items():
+            rows = [
+                (chunk_ids[(doc_id, para)], tf)
+                for doc_id, paras in docs.items()
+                for para, tf in paras.items()
+                if (doc_id, para) in chunk_ids
+            ]
+            if not rows:
+                continue
+            idf = math.log(1 + (count - len(rows) + 0.5) / (len(rows) + 0.5))
+            ids, weights = [], []
+            for chunk, tf in rows:
+                norm = 1 - BM25_B + BM25_B * (lengths[chunk] / avg_length if avg_length else 1)
+                ids.append(chunk)
+                weights.append(idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * norm))
+            self.postings[term] = (ids, weights)
+
+        if np is not None:
+            self.postings = {
+                term: (np.asarray(ids, dtype=np.int64), np.asarray(weights, dtype=np.float64))
+                for term, (ids, weights) in self.postings.items()
+            }
+
+    def __len__(self) -> int:
+        return len(self.chunks)
+
+    def scores(self, query: Dict[str, float]):
+        """Score BM25 de chaque paragraphe (tableau NumPy ou liste)"""
+        if np is not None:
+            scores = np.zeros(len(self.chunks), dtype=np.float64)
+            for term, weight in query.items():
+                posting = self.postings.get(term)
+                if posting is not None:
+                    # Un terme n'apparaît qu'une fois par paragraphe dans ses postings
+                    scores[posting[0]] += weight * posting[1]
+            return scores
+
+        scores = [0.0] * len(self.chunks)
+        for term, weight in query.items():
+            posting = self.postings.get(term)
+            if posting is not None:
+                for chunk, value in zip(*posting):
+                    scores[chunk] += weight * value
+        return scores
+
+    def top_k(
+        self,
+        query: Dict[str, float],
+        k: int,
+        documents: Optional[Iterable[str]] = None
+    ) -> List[Tuple[str, int, str, float]]:
+        """
+        Meilleurs paragraphes pour une requête
+
+        Args:
+            query: Requête pondérée (voir build_query)
+            k: Nombre maximal de résultats
+            documents: Restreint le classement à ces documents
+
+        Returns:
+            [(document, numéro de paragraphe, texte, score)] par score décroissant,
+            sans les paragraphes de score nul
+        """
+        if k <= 0 or not self.chunks:
+            return []
+        scores = self.scores(query)
+        candidates = range(len(self.chunks))
+        if documents is not None:
+            documents = set(documents)
+            candidates = [i for i in candidates if self.chunks[i][0] in documents]
+
+        if np is not None:
+            candidates = np.asarray(list(candidates), dtype=np.int64)
+            candidates = candidates[scores[candidates] > 0]
+            if len(candidates) > k:
+                candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+            best = sorted(candidates.tolist(), key=lambda i: -scores[i])
+        else:
+            best = heapq.nlargest(k, (i for i in candidates if scores[i] > 0), key=lambda i: scores[i])
+
+        return [
+            (self.chunks[i][0], self.chunks[i][1], self.chunk_texts[i], float(scores[i]))
+            for i in best
+        ]
@@ -0,0 +1,168 @@
+"""
+Assemblage de contextes de prompt sous contrainte de budget en tokens
+"""
+
+import logging
+import math
+import re
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Mots (lettres accentuées comprises), nombres, ou tout autre caractère non blanc
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+
+# Les tokenizers BPE découpent en moyenne un mot français en ~1.3 tokens
+TOKENS_PER_WORD = 1.3
+
+TRUNCATION_MARK = " […]"
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estime localement le nombre de tokens d'un texte
+
+    Estimation sans appel réseau ni dépendance: mots × 1.3 + ponctuation.
+    Suffisant pour respecter un budget, pas pour facturer.
+    """
+    words = 0
+    symbols = 0
+    for match in _TOKEN_RE.finditer(text):
+        if match.group()[0].isalnum() or match.group()[0] == '_':
+            words += 1
+        else:
+            symbols += 1
+    return math.ceil(words * TOKENS_PER_WORD) + symbols
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    Tronque un texte pour qu'il tienne dans max_tokens (estimation)
+
+    La coupe se fait en fin de mot et est signalée par TRUNCATION_MARK.
+    """
+    if max_tokens <= 0:
+        return ""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+
+    budget = max_tokens - estimate_tokens(TRUNCATION_MARK)
+    used = 0.0
+    end = 0
+    for match in _TOKEN_RE.finditer(text):
+        cost = TOKENS_PER_WORD if match.group()[0].isalnum() or match.group()[0] == '_' else 1
+        if used + cost > budget:
+            break
+        used += cost
+        end = match.end()
+    return text[:end].rstrip() + TRUNCATION_MARK if end else ""
+
+
+def _normalize_for_dedup(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+class ContextBuilder:
+    """
+    Remplit un budget de tokens section par section
+
+    Les sections sont ajoutées par ordre de priorité: chacune est tronquée
+    à ce qui reste du budget, de sorte que les sections les moins
+    prioritaires sont sacrifiées en premier. La consommation de chaque
+    section est conservée dans `usage`.
+
+    Usage:
+        builder = ContextBuilder(token_budget=6000)
+        analysis = builder.add("analyse", offer_analysis)
+        education = builder.add_ranked("education", snippets, max_item_tokens=250)
+        logger.info(builder.report())
+    """
+
+    def __init__(self, token_budget: int):
+        """
+        Args:
+            token_budget: Budget total estimé en tokens
+        """
+        self.token_budget = token_budget
+        self.usage: Dict[str, int] = {}
+
+    @property
+    def used(self) -> int:
+        return sum(self.usage.values())
+
+    @property
+    def remaining(self) -> int:
+        return max(0, self.token_budget - self.used)
+
+    def reserve(self, name: str, text: str) -> str:
+        """Compte une section incompressible (ex: instructions) sans la tronquer"""
+        self.usage[name] = self.usage.get(name, 0) + estimate_tokens(text)
+        return text
+
+    def add(self, name: str, text: str, max_tokens: Optional[int] = None) -> str:
+        """
+        Ajoute une section, tronquée au budget restant
+
+        Args:
+            name: Nom de la section (pour le rapport)
+            text: Contenu
+            max_tokens: Plafond propre à la section
+
+        Returns:
+            Contenu éventuellement tronqué
+        """
+        limit = self.remaining if max_tokens is None else min(max_tokens, self.remaining)
+        packed = truncate_to_tokens(text, limit)
+        self.usage[name] = self.usage.get(name, 0) + estimate_tokens(packed)
+        return packed
+
+    def add_ranked(
+        self,
+        name: str,
+        snippets: List[Tuple[str, str, float]],
+        max_item_tokens: Optional[int] = None,
+        max_tokens: Optional[int] = None
+    ) -> List[Tuple[str, str]]:
+        """
+        Sélectionne les meilleurs extraits qui tiennent dans le budget
+
+        Les doublons (même clé ou même texte normalisé) sont ignorés; les
+        extraits sont pris par score décroissant tant qu'il reste du budget.
+
+        Args:
+            name: Nom de la section (pour le rapport)
+            snippets: (clé, texte, score) — un score <= 0 exclut l'extrait
+            max_item_tokens: Plafond par extrait (tronqué au-delà)
+            max_tokens: Plafond de la section
+
+        Returns:
+            [(clé, texte retenu)] par score décroissant
+        """
+        limit = self.remaining if max_tokens is None else min(max_tokens, self.remaining)
+        seen_keys = set()
+        seen_texts = set()
+        selected = []
+        used = 0
+
+        for key, text, score in sorted(snippets, key=lambda s: s[2], reverse=True):
+            normalized = _normalize_for_dedup(text)
+            if score <= 0 or key in seen_keys or normalized in seen_texts:
+                continue
+            seen_keys.add(key)
+            seen_texts.add(normalized)
+
+            if max_item_tokens is not None:
+                text = truncate_to_tokens(text, max_item_tokens)
+            cost = estimate_tokens(text)
+            if used + cost > limit:
+                continue
+            selected.append((key, text))
+            used += cost
+
+        self.usage[name] = self.usage.get(name, 0) + used
+        return selected
+
+    def report(self) -> str:
+        """Résumé lisible de la consommation par section"""
+        details = ", ".join(f"{name} {tokens}" for name, tokens in self.usage.items())
+        return f"{self.used}/{self.token_budget} tokens ({details})"
@@ -0,0 +1,243 @@
+"""
+Suivi persistant de l'état des offres et de leurs étapes de traitement
+Remplace la réécriture complète de offres.json après chaque offre
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS offers (
+    name TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    processed INTEGER NOT NULL DEFAULT 0,
+    exported_processed INTEGER,
+    active INTEGER NOT NULL DEFAULT 1,
+    position INTEGER,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS stages (
+    offer TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    status TEXT NOT NULL,
+    output TEXT,
+    error TEXT,
+    started_at REAL,
+    finished_at REAL,
+    duration REAL,
+    PRIMARY KEY (offer, stage)
+);
+"""
+
+# Statuts possibles d'une étape
+STAGE_RUNNING = "running"
+STAGE_DONE = "done"
+STAGE_FAILED = "failed"
+
+# Étapes du traitement d'une offre, dans l'ordre, et leurs dépendances directes
+STAGES = ["analysis", "themes", "cv_json", "pdf", "letter"]
+STAGE_DEPENDENCIES = {
+    "analysis": [],
+    "themes": ["analysis"],
+    "cv_json": ["themes"],
+    "pdf": ["cv_json"],
+    "letter": ["themes"],
+}
+
+
+def downstream_stages(stage: str) -> List[str]:
+    """
+    Étape donnée et toutes celles qui en dépendent (directement ou non)
+
+    Args:
+        stage: Nom de l'étape
+
+    Returns:
+        Étapes à régénérer, dans l'ordre de STAGES
+    """
+    affected = {stage}
+    for candidate in STAGES:
+        if any(dep in affected for dep in STAGE_DEPENDENCIES[candidate]):
+            affected.add(candidate)
+    return [s for s in STAGES if s in affected]
+
+
+class JobStore:
+    """
+    État des offres dans une base SQLite (mode WAL)
+
+    offres.json reste la source de la liste des offres et l'export lisible
+    de leur statut: il est synchronisé au chargement (sync_offers) et
+    réécrit en une fois en fin d'exécution (export_json). Entre les deux,
+    chaque mise à jour est une transaction SQLite atomique, sûre même quand
+    plusieurs offres terminent en même temps.
+
+    Les méthodes sont synchrones: les appeler via asyncio.to_thread depuis
+    du code asynchrone.
+    """
+
+    def __init__(self, db_path: Path):
+        """
+        Args:
+            db_path: Chemin de la base SQLite (créée si nécessaire)
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            # Bases créées avant l'ajout de la position dans offres.json
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(offers)")}
+            if "position" not in columns:
+                conn.execute("ALTER TABLE offers ADD COLUMN position INTEGER")
+
+    @contextmanager
+    def _connect(self):
+        """Ouvre une connexion (une par appel, utilisable depuis n'importe quel thread)"""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def sync_offers(self, offers: Dict[str, List[Any]]):
+        """
+        Synchronise la base avec le contenu de offres.json
+
+        - une offre absente de la base y est ajoutée avec le statut du JSON
+        - si le statut du JSON diffère du dernier export, c'est une
+          modification manuelle: il est appliqué. Une remise à false
+          (régénération demandée) efface aussi les étapes enregistrées de
+          l'offre, pour qu'aucune ne soit reprise
+        - sinon le statut de la base prévaut (mises à jour non encore
+          exportées, par exemple après un arrêt brutal)
+        - les offres retirées du JSON sont désactivées
+        - la position de chaque offre dans le JSON est mémorisée (ordre de l'export)
+
+        Args:
+            offers: Contenu de offres.json {nom: [chemin, traité]}
+        """
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("UPDATE offers SET active = 0")
+            for position, (name, (path, processed)) in enumerate(offers.items()):
+                row = conn.execute(
+                    "SELECT processed, exported_processed FROM offers WHERE name = ?", (name,)
+                ).fetchone()
+                processed = int(bool(processed))
+                if row is None:
+                    conn.execute(
+                        "INSERT INTO offers (name, path, processed, exported_processed, active, position, updated_at) "
+                        "VALUES (?, ?, ?, ?, 1, ?, ?)",
+                        (name, path, processed, processed, position, now)
+                    )
+                elif row["exported_processed"] is not None and row["exported_processed"] != processed:
+                    conn.execute(
+                        "UPDATE offers SET path = ?, processed = ?, exported_processed = ?, active = 1, "
+                        "position = ?, updated_at = ? WHERE name = ?",
+                        (path, processed, processed, position, now, name)
+                    )
+                    if not processed:
+                        conn.execute("DELETE FROM stages WHERE offer = ?", (name,))
+                else:
+                    conn.execute(
+                        "UPDATE offers SET path = ?, active = 1, position = ? WHERE name = ?",
+                        (path, position, name)
+                    )
+
+    def offers(self) -> Dict[str, Tuple[str, bool]]:
+        """
+        Offres actives, dans l'ordre de offres.json
+
+        Returns:
+            {nom: (chemin, traité)}
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT name, path, processed FROM offers WHERE active = 1 ORDER BY position, rowid"
+            ).fetchall()
+        return {row["name"]: (row["path"], bool(row["processed"])) for row in rows}
+
+    def set_processed(self, offer: str, processed: bool):
+        """Met à jour le statut global d'une offre"""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE offers SET processed = ?, updated_at = ? WHERE name = ?",
+                (int(processed), time.time(), offer)
+            )
+
+    def start_stage(self, offer: str, stage: str):
+        """Marque une étape comme en cours"""
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO stages (offer, stage, status, output, error, started_at, finished_at, duration) "
+                "VALUES (?, ?, ?, NULL, NULL, ?, NULL, NULL)",
+                (offer, stage, STAGE_RUNNING, time.time())
+            )
+
+    def finish_stage(self, offer: str, stage: str, output: Optional[str] = None):
+        """Marque une étape comme terminée avec son résultat (ex: chemin du fichier produit)"""
+        self._end_stage(offer, stage, STAGE_DONE, output=output)
+
+    def fail_stage(self, offer: str, stage: str, error: str):
+        """Marque une étape comme échouée"""
+        self._end_stage(offer, stage, STAGE_FAILED, error=error)
+
+    def _end_stage(self, offer: str, stage: str, status: str, output: Optional[str] = None, error: Optional[str] = None):
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT started_at FROM stages WHERE offer = ? AND stage = ?", (offer, stage)
+            ).fetchone()
+            started_at = row["started_at"] if row and row["started_at"] else now
+            conn.execute(
+                "INSERT OR REPLACE INTO stages (offer, stage, status, output, error, started_at, finished_at, duration) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (offer, stage, status, output, error, started_at, now, now - started_at)
+            )
+
+    def stages(self, offer: str) -> Dict[str, Dict[str, Any]]:
+        """
+        État des étapes d'une offre
+
+        Returns:
+            {étape: {'status', 'output', 'error', 'started_at', 'finished_at', 'duration'}}
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT stage, status, output, error, started_at, finished_at, duration "
+                "FROM stages WHERE offer = ?", (offer,)
+            ).fetchall()
+        return {row["stage"]: {key: row[key] for key in row.keys() if key != "stage"} for row in rows}
+
+    def export_json(self, json_path: Path):
+        """
+        Réécrit offres.json depuis la base (écriture atomique)
+
+        Args:
+            json_path: Chemin de offres.json
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT name, path, processed FROM offers WHERE active = 1 ORDER BY position, rowid"
+            ).fetchall()
+            data = {row["name"]: [row["path"], bool(row["processed"])] for row in rows}
+
+            tmp_path = Path(json_path).with_name(Path(json_path).name + '.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(json.dumps(data, indent=2, ensure_ascii=False))
+            os.replace(tmp_path, json_path)
+
+            conn.execute("UPDATE offers SET exported_processed = processed WHERE active = 1")
+
+        logger.info(f"État des offres exporté: {json_path}")
@@ -0,0 +1,308 @@
+"""
+Serveur OpenRouter simulé pour les tests de charge et les mesures hors ligne
+Répond à POST /chat/completions (JSON ou SSE) avec des réponses types par
+étape, des latences tirées d'une distribution et des erreurs 429/500 injectées
+
+Usage:
+    python src/utils/mock_openrouter.py --port 8080 --latency lognormal:0.7,0.5 --rate-429 0.05
+    OPENROUTER_BASE_URL=http://127.0.0.1:8080 OPENROUTER_API_KEY=mock python src/main.py
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import math
+import random
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+STAGES = ["analysis", "analysis_structured", "themes", "cv_json", "letter"]
+
+# Fragments des prompts système du client, dans l'ordre de test
+STAGE_MARKERS = [
+    ("analysis_structured", ("analyse de recrutement", "uniquement en json")),
+    ("analysis", ("analyse de recrutement",)),
+    ("themes", ("thèmes et mots-clés",)),
+    ("cv_json", ("cv au format json",)),
+    ("letter", ("lettres de motivation",)),
+]
+
+DEFAULT_RESPONSES: Dict[str, str] = {
+    "analysis": "\n\n".join(
+        f"## Section {i}\n\nContenu simulé de l'analyse de l'offre (section {i})." for i in range(1, 9)
+    ) + "\n\n## Résumé Exécutif\n\nOffre simulée pour les tests de charge.\n",
+    "analysis_structured": json.dumps({
+        "sections": [
+            {"title": f"Section {i}", "content": f"Contenu simulé de l'analyse de l'offre (section {i})."}
+            for i in range(1, 9)
+        ],
+        "summary": "Offre simulée pour les tests de charge.",
+        "themes": ["Python", "Data Engineering", "Cloud", "Gestion de projet"]
+    }, ensure_ascii=False),
+    "themes": '["Python", "Data Engineering", "Cloud", "Gestion de projet"]',
+    "cv_json": json.dumps({
+        "basics": {"name": "Candidat Test", "headline": "Ingénieur (réponse simulée)", "email": "", "phone": ""},
+        "sections": {
+            "summary": {"name": "Profil", "visible": True, "content": "<p>CV généré par le serveur simulé.</p>"},
+            "experience": {"name": "Expérience", "visible": True, "items": []},
+            "education": {"name": "Formation", "visible": True, "items": []},
+            "skills": {"name": "Compétences", "visible": True, "items": []}
+        },
+        "metadata": {"template": "pikachu"}
+    }, ensure_ascii=False),
+    "letter": "Madame, Monsieur,\n\n"
+              "Cette lettre est produite par le serveur OpenRouter simulé pour mesurer le pipeline.\n\n"
+              "Je vous prie d'agréer mes salutations distinguées.\n",
+}
+
+
+def parse_distribution(spec: str) -> Callable[[random.Random], float]:
+    """
+    Convertit une description de latence en fonction de tirage (secondes)
+
+    Formats acceptés:
+        fixed:0.5               durée constante
+        uniform:0.2,1.5         uniforme entre deux bornes
+        normal:1.0,0.3          moyenne, écart-type (tronquée à 0)
+        lognormal:0.7,0.5       médiane, sigma du logarithme (queue longue)
+        exponential:1.0         moyenne
+
+    Raises:
+        ValueError: Si le format est inconnu
+    """
+    kind, _, args = spec.partition(":")
+    try:
+        values = [float(v) for v in args.split(",")] if args else []
+    except ValueError:
+        raise ValueError(f"Paramètres invalides pour la latence: {spec}")
+
+    if kind == "fixed" and len(values) == 1:
+        return lambda rng: values[0]
+    if kind == "uniform" and len(values) == 2:
+        return lambda rng: rng.uniform(values[0], values[1])
+    if kind == "normal" and len(values) == 2:
+        return lambda rng: max(0.0, rng.gauss(values[0], values[1]))
+    if kind == "lognormal" and len(values) == 2:
+        return lambda rng: rng.lognormvariate(math.log(values[0]), values[1])
+    if kind == "exponential" and len(values) == 1:
+        return lambda rng: rng.expovariate(1 / values[0])
+    raise ValueError(f"Distribution de latence inconnue: {spec}")
+
+
+def message_text(content: Any) -> str:
+    """Texte d'un message (chaîne ou liste de blocs)"""
+    if isinstance(content, list):
+        return "".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return str(content or "")
+
+
+def detect_stage(messages: List[Dict[str, Any]]) -> Optional[str]:
+    """Étape du pipeline reconnue d'après le prompt système"""
+    system = " ".join(
+        message_text(m.get("content")) for m in messages if m.get("role") == "system"
+    ).lower()
+    for stage, markers in STAGE_MARKERS:
+        if all(marker in system for marker in markers):
+            return stage
+    return None
+
+
+class MockOpenRouter:
+    """
+    Application aiohttp simulant l'endpoint /chat/completions
+
+    Chaque requête attend une latence tirée de la distribution de son étape
+    (délai avant le premier token en streaming), puis renvoie la réponse
+    type de l'étape. Une part des requêtes reçoit un 429 (avec Retry-After)
+    ou un 500 avant toute génération.
+    """
+
+    def __init__(
+        self,
+        latency: Dict[Optional[str], Callable[[random.Random], float]],
+        responses: Optional[Dict[str, str]] = None,
+        rate_429: float = 0.0,
+        rate_500: float = 0.0,
+        retry_after: float = 1.0,
+        token_delay: float = 0.0,
+        chunk_words: int = 5,
+        seed: Optional[int] = None
+    ):
+        """
+        Args:
+            latency: Distribution par étape (clé None: étapes sans distribution propre)
+            responses: Réponses types par étape (complètent DEFAULT_RESPONSES)
+            rate_429: Part des requêtes refusées par un 429
+            rate_500: Part des requêtes en erreur 500
+            retry_after: Valeur de Retry-After des 429 (secondes)
+            token_delay: Délai entre deux fragments SSE (secondes)
+            chunk_words: Nombre de mots par fragment SSE
+            seed: Graine du générateur aléatoire (reproductibilité)
+        """
+        self.latency = latency
+        self.responses = {**DEFAULT_RESPONSES, **(responses or {})}
+        self.rate_429 = rate_429
+        self.rate_500 = rate_500
+        self.retry_after = retry_after
+        self.token_delay = token_delay
+        self.chunk_words = max(1, chunk_words)
+        self.rng = random.Random(seed)
+        self.stats: Dict[str, Dict[str, int]] = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def app(self) -> web.Application:
+        """Application aiohttp (préfixe OpenRouter /api/v1 accepté)"""
+        app = web.Application()
+        app.router.add_post("/chat/completions", self.handle_completion)
+        app.router.add_post("/api/v1/chat/completions", self.handle_completion)
+        app.router.add_get("/stats", self.handle_stats)
+        return app
+
+    def _count(self, stage: Optional[str], outcome: str):
+        counters = self.stats.setdefault(stage or "unknown", {})
+        counters[outcome] = counters.get(outcome, 0) + 1
+
+    def _sample_latency(self, stage: Optional[str]) -> float:
+        sampler = self.latency.get(stage) or self.latency.get(None)
+        return sampler(self.rng) if sampler else 0.0
+
+    def _chunks(self, content: str) -> List[str]:
+        """Découpe la réponse en fragments de quelques mots (espaces conservés)"""
+        words = content.split(" ")
+        return [
+            " ".join(words[i:i + self.chunk_words]) + (" " if i + self.chunk_words < len(words) else "")
+            for i in range(0, len(words), self.chunk_words)
+        ]
+
+    async def handle_completion(self, request: web.Request) -> web.StreamResponse:
+        payload = await request.json()
+        messages = payload.get("messages", [])
+        stage = detect_stage(messages)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            draw = self.rng.random()
+            if draw < self.rate_429:
+                self._count(stage, "429")
+                return web.json_response(
+                    {"error": {"code": 429, "message": "Rate limit exceeded (mock)"}},
+                    status=429,
+                    headers={"Retry-After": f"{self.retry_after:g}"}
+                )
+            if draw < self.rate_429 + self.rate_500:
+                self._count(stage, "500")
+                return web.json_response({"error": {"code": 500, "message": "Internal error (mock)"}}, status=500)
+
+            await asyncio.sleep(self._sample_latency(stage))
+            content = self.responses.get(stage, "Réponse simulée.")
+            prompt_tokens = sum(len(message_text(m.get("content")).split()) for m in messages)
+            usage = {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": len(content.split()),
+                "total_tokens": prompt_tokens + len(content.split())
+            }
+            model = payload.get("model", "mock/model")
+            self._count(stage, "ok")
+
+            if not payload.get("stream"):
+                return web.json_response({
+                    "id": f"mock-{time.time_ns()}",
+                    "model": model,
+                    "choices": [{
+                        "index": 0,
+                        "message": {"role": "assistant", "content": content},
+                        "finish_reason": "stop"
+                    }],
+                    "usage": usage
+                })
+
+            response = web.StreamResponse(headers={"Content-Type": "text/event-stream", "Cache-Control": "no-cache"})
+            await response.prepare(request)
+            await response.write(b": OPENROUTER PROCESSING\n\n")
+            for chunk in self._chunks(content):
+                event = {"model": model, "choices": [{"index": 0, "delta": {"content": chunk}}]}
+                await response.write(f"data: {json.dumps(event, ensure_ascii=False)}\n\n".encode("utf-8"))
+                if self.token_delay:
+                    await asyncio.sleep(self.token_delay)
+            final = {"model": model, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}], "usage": usage}
+            await response.write(f"data: {json.dumps(final)}\n\n".encode("utf-8"))
+            await response.write(b"data: [DONE]\n\n")
+            await response.write_eof()
+            return response
+        finally:
+            self.in_flight -= 1
+
+    async def handle_stats(self, request: web.Request) -> web.Response:
+        """Compteurs par étape et concurrence maximale observée"""
+        return web.json_response({"stages": self.stats, "max_in_flight": self.max_in_flight})
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Analyse les arguments de la ligne de commande"""
+    parser = argparse.ArgumentParser(description="Serveur OpenRouter simulé (/chat/completions, JSON et SSE)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument(
+        "--latency",
+        action="append",
+        default=[],
+        metavar="[ÉTAPE=]DISTRIBUTION",
+        help="Latence avant réponse, ex: lognormal:0.7,0.5 ou cv_json=uniform:2,8 "
+             f"(répétable; étapes: {', '.join(STAGES)})"
+    )
+    parser.add_argument("--rate-429", type=float, default=0.0, help="Part des requêtes refusées par un 429")
+    parser.add_argument("--rate-500", type=float, default=0.0, help="Part des requêtes en erreur 500")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After des 429 (secondes)")
+    parser.add_argument("--token-delay", type=float, default=0.01, help="Délai entre fragments SSE (secondes)")
+    parser.add_argument(
+        "--responses",
+        metavar="FICHIER",
+        help="JSON {étape: contenu} remplaçant les réponses types"
+    )
+    parser.add_argument("--seed", type=int, help="Graine aléatoire (reproductibilité)")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    """Point d'entrée: lance le serveur jusqu'à Ctrl+C puis affiche les compteurs"""
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    latency: Dict[Optional[str], Callable[[random.Random], float]] = {}
+    for spec in args.latency:
+        stage, sep, distribution = spec.partition("=")
+        if sep and stage not in STAGES:
+            raise SystemExit(f"Étape inconnue: {stage} (attendu: {', '.join(STAGES)})")
+        latency[stage if sep else None] = parse_distribution(distribution if sep else spec)
+
+    responses = None
+    if args.responses:
+        with open(args.responses, 'r', encoding='utf-8') as f:
+            responses = json.load(f)
+
+    mock = MockOpenRouter(
+        latency,
+        responses=responses,
+        rate_429=args.rate_429,
+        rate_500=args.rate_500,
+        retry_after=args.retry_after,
+        token_delay=args.token_delay,
+        seed=args.seed
+    )
+    print(f"🧪 OpenRouter simulé sur http://{args.host}:{args.port} "
+          f"(OPENROUTER_BASE_URL=http://{args.host}:{args.port})")
+    try:
+        web.run_app(mock.app(), host=args.host, port=args.port, print=None, access_log=None)
+    finally:
+        print(f"📊 Requêtes par étape: {json.dumps(mock.stats, ensure_ascii=False)}, "
+              f"concurrence max: {mock.max_in_flight}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+Choix du modèle OpenRouter par étape du pipeline
+Modèle principal par étape, chaîne de repli et routage selon la latence observée
+"""
+
+import logging
+import time
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Nombre de durées conservées par étape pour le calcul des percentiles
+SAMPLE_WINDOW = 200
+
+
+class ModelRouter:
+    """
+    Ordonne les modèles candidats d'une étape
+
+    Pour chaque étape, les candidats sont le modèle de l'étape suivi de la
+    chaîne de repli commune. Un modèle en échec (délai dépassé, 429 ou
+    erreur serveur persistants) est écarté pendant `cooldown` secondes.
+    Avec le routage par latence, les candidats sains sont triés par latence
+    moyenne (moyenne mobile exponentielle par étape et par modèle). Le
+    modèle de l'étape reste en tête tant qu'il n'a pas été mesuré; ensuite,
+    un candidat encore jamais mesuré passe en premier pour être évalué.
+
+    Usage:
+        router = ModelRouter({"themes": "fast/model"}, default_model="main/model")
+        for model in router.chain("themes"):
+            ...
+            router.record_success("themes", model, latency)
+    """
+
+    def __init__(
+        self,
+        stage_models: Dict[str, Optional[str]],
+        default_model: str,
+        fallback_models: Optional[List[str]] = None,
+        latency_routing: bool = False,
+        cooldown: float = 60.0,
+        alpha: float = 0.3
+    ):
+        """
+        Args:
+            stage_models: Modèle principal par étape (None = modèle par défaut)
+            default_model: Modèle des étapes sans configuration propre
+            fallback_models: Modèles essayés ensuite, dans l'ordre
+            latency_routing: Trier les candidats sains par latence observée
+            cooldown: Durée d'exclusion d'un modèle en échec (secondes)
+            alpha: Poids de la dernière mesure dans la moyenne mobile
+        """
+        self.stage_models = {stage: model for stage, model in stage_models.items() if model}
+        self.default_model = default_model
+        self.fallback_models = fallback_models or []
+        self.latency_routing = latency_routing
+        self.cooldown = cooldown
+        self.alpha = alpha
+        self._latency: Dict[Tuple[str, str], float] = {}
+        self._calls: Dict[Tuple[str, str], int] = {}
+        self._failures: Dict[Tuple[str, str], int] = {}
+        self._unhealthy_until: Dict[str, float] = {}
+        # Dernières durées d'appel par étape, tous modèles confondus (percentiles)
+        self._samples: Dict[Optional[str], deque] = {}
+
+    def primary(self, stage: Optional[str]) -> str:
+        """Modèle configuré pour une étape"""
+        return self.stage_models.get(stage, self.default_model)
+
+    def candidates(self, stage: Optional[str]) -> List[str]:
+        """Modèle de l'étape puis chaîne de repli, sans doublon"""
+        models = []
+        for model in [self.primary(stage)] + self.fallback_models:
+            if model and model not in models:
+                models.append(model)
+        return models
+
+    def is_healthy(self, model: str) -> bool:
+        return time.monotonic() >= self._unhealthy_until.get(model, 0.0)
+
+    def chain(self, stage: Optional[str]) -> List[str]:
+        """
+        Ordre dans lequel essayer les modèles pour une étape
+
+        Returns:
+            Candidats sains (triés par latence si activé), puis les modèles
+            écartés en dernier recours
+        """
+        candidates = self.candidates(stage)
+        healthy = [m for m in candidates if self.is_healthy(m)]
+        unhealthy = [m for m in candidates if m not in healthy]
+
+        primary = self.primary(stage)
+        primary_measured = (stage, primary) in self._latency or primary not in healthy
+        if self.latency_routing and primary_measured:
+            # Tri stable: les modèles non mesurés gardent leur rang et passent devant
+            healthy.sort(key=lambda m: self._latency.get((stage, m), 0.0))
+        return healthy + unhealthy
+
+    def record_success(self, stage: Optional[str], model: str, latency: float):
+        """Enregistre un appel réussi et sa durée"""
+        key = (stage, model)
+        previous = self._latency.get(key)
+        self._latency[key] = latency if previous is None else self.alpha * latency + (1 - self.alpha) * previous
+        self._calls[key] = self._calls.get(key, 0) + 1
+        self._samples.setdefault(stage, deque(maxlen=SAMPLE_WINDOW)).append(latency)
+        self._unhealthy_until.pop(model, None)
+
+    def record_censored(self, stage: Optional[str], elapsed: float):
+        """
+        Enregistre la durée d'un appel abandonné avant sa réponse (borne basse)
+
+        Sans ces mesures, les percentiles ne porteraient que sur les appels
+        les plus rapides et baisseraient à chaque doublement gagné. La
+        latence moyenne du modèle n'est pas modifiée.
+        """
+        self._samples.setdefault(stage, deque(maxlen=SAMPLE_WINDOW)).append(elapsed)
+
+    def record_failure(self, stage: Optional[str], model: str):
+        """Enregistre un échec et écarte le modèle pendant le délai de refroidissement"""
+        key = (stage, model)
+        self._failures[key] = self._failures.get(key, 0) + 1
+        self._unhealthy_until[model] = time.monotonic() + self.cooldown
+        logger.warning(f"Modèle {model} écarté pendant {self.cooldown:.0f}s (étape {stage})")
+
+    def latency(self, stage: Optional[str], model: str) -> Optional[float]:
+        """Latence moyenne observée (None si jamais mesurée)"""
+        return self._latency.get((stage, model))
+
+    def latency_percentile(self, stage: Optional[str], q: float, min_samples: int = 1) -> Optional[float]:
+        """
+        Percentile des durées d'appel récentes d'une étape
+
+        Args:
+            stage: Étape
+            q: Percentile entre 0 et 1 (ex: 0.9)
+            min_samples: Nombre minimal de mesures pour répondre
+
+        Returns:
+            Durée en secondes, ou None si les mesures sont insuffisantes
+        """
+        samples = sorted(self._samples.get(stage, ()))
+        if len(samples) < max(1, min_samples):
+            return None
+        return samples[int(q * (len(samples) - 1))]
+
+    def stats(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """
+        Appels, échecs et latence moyenne par étape et par modèle
+
+        Returns:
+            {étape: {modèle: {'calls', 'failures', 'latency'}}}
+        """
+        stats: Dict[str, Dict[str, Dict[str, float]]] = {}
+        for stage, model in set(self._calls) | set(self._failures):
+            stats.setdefault(stage, {})[model] = {
+                'calls': self._calls.get((stage, model), 0),
+                'failures': self._failures.get((stage, model), 0),
+                'latency': self._latency.get((stage, model))
+            }
+        return stats
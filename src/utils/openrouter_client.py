@@ -3,9 +3,28 @@ Client OpenRouter pour les appels IA
 """
 
 import os
+import sys
+import asyncio
 import json
+import logging
+import random
+import statistics
+import time
 import aiohttp
-from typing import Optional, Dict, Any
+import aiofiles
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import AsyncIterator, Callable, List, Optional, Dict, Any, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from config.settings import settings
+from utils.context_builder import estimate_tokens
+from utils.rate_limiter import AIMDLimiter, TokenBucket
+from utils.model_router import ModelRouter
+from utils.response_cache import ResponseCache, request_key
+
+logger = logging.getLogger(__name__)
 
 # Chargement du fichier .env
 env_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), '.env')
@@ -18,77 +37,772 @@ if os.path.exists(env_path):
                 os.environ[key.strip()] = value.strip()
 
 OPENROUTER_API_KEY = os.environ.get("OPENROUTER_API_KEY")
-OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
+
+# Statuts relancés en plus du 429 (délai dépassé, erreurs serveur/passerelle)
+RETRYABLE_STATUSES = {408, 500, 502, 503, 504}
+
+# Statuts pour lesquels on passe au modèle suivant de la chaîne de repli
+# (en plus du 429): modèle inconnu ou retiré, ou toujours en erreur après les tentatives
+FALLBACK_STATUSES = RETRYABLE_STATUSES | {404}
+
+# Prompts d'extraction des thèmes (leur hash identifie les thèmes persistés)
+THEMES_SYSTEM_PROMPT = "Tu extrais les thèmes et mots-clés d'une offre d'emploi pour contextualiser la génération d'un CV. Réponds UNIQUEMENT avec une liste Python de chaînes."
+THEMES_USER_PROMPT = """Extrait une liste de thèmes/mots-clés pertinents pour contextualiser un CV.
+Format de sortie: ["thème1", "thème2", "thème3"]
+
+Analyse de l'offre:
+{offer_analysis}"""
+
+# Consignes du mode d'analyse structuré (rapport + thèmes en un seul appel)
+STRUCTURED_ANALYSIS_SECTIONS = 8
+STRUCTURED_ANALYSIS_INSTRUCTIONS = """
+FORMAT DE RÉPONSE:
+Réponds UNIQUEMENT avec un objet JSON valide, sans markdown autour, de la forme:
+{
+  "sections": [
+    {"title": "1. Exigences Obligatoires", "content": "contenu markdown de la section"},
+    ... (exactement 8 sections, dans l'ordre demandé)
+  ],
+  "summary": "résumé exécutif de 3-4 lignes",
+  "themes": ["thème1", "thème2", "thème3"]
+}
+Le champ "themes" contient les thèmes/mots-clés pertinents pour contextualiser un CV.
+"""
+
+
+class OpenRouterError(Exception):
+    """Réponse en erreur de l'API OpenRouter"""
+
+    def __init__(self, status: int, message: str, retry_after: Optional[float] = None):
+        super().__init__(f"Erreur OpenRouter {status}: {message}")
+        self.status = status
+        self.retry_after = retry_after
+
+
+class OpenRouterRateLimitError(OpenRouterError):
+    """Limite de débit atteinte (429)"""
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Interprète un en-tête Retry-After (secondes ou date HTTP)
+
+    Returns:
+        Délai en secondes, ou None si absent/illisible
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+def prompt_messages(system: str, prompt: str, prefix: Optional[str] = None) -> list:
+    """
+    Construit les messages d'un appel dont le début du prompt est stable
+
+    Le préfixe (identique d'une offre à l'autre) est placé en tête du message
+    utilisateur pour que le cache de prompt du fournisseur puisse le
+    réutiliser. Avec OPENROUTER_PROMPT_CACHE_CONTROL, il est envoyé comme un
+    bloc séparé marqué `cache_control` (fournisseurs à cache explicite);
+    sinon le texte est simplement concaténé (cache automatique par préfixe).
+
+    Args:
+        system: Message système
+        prompt: Partie du prompt propre à l'appel
+        prefix: Partie stable du prompt
+
+    Returns:
+        Liste de messages pour chat_completion
+    """
+    if prefix is None:
+        content = prompt
+    elif settings.openrouter_prompt_cache_control:
+        content = [
+            {"type": "text", "text": prefix, "cache_control": {"type": "ephemeral"}},
+            {"type": "text", "text": prompt}
+        ]
+    else:
+        content = prefix + prompt
+    return [
+        {"role": "system", "content": system},
+        {"role": "user", "content": content}
+    ]
+
 
 class OpenRouterClient:
-    """Client asynchrone pour OpenRouter"""
+    """
+    Client asynchrone pour OpenRouter
+
+    Maintient une session aiohttp unique (pool de connexions keep-alive,
+    cache DNS) réutilisée par tous les appels. Utilisable comme context
+    manager asynchrone pour garantir la fermeture du pool:
+
+        async with OpenRouterClient() as client:
+            await client.chat_completion(...)
+    """
 
     def __init__(self):
         self.api_key = OPENROUTER_API_KEY
-        self.base_url = OPENROUTER_BASE_URL
-        # Modèle plus stable pour éviter les rate limits
-        self.model = "anthropic/claude-3-haiku"
+        # Endpoint configurable (ex: serveur simulé utils/mock_openrouter.py)
+        self.base_url = settings.openrouter_base_url.rstrip('/')
+        # Modèle par défaut; chaque étape peut avoir le sien et une chaîne de repli
+        self.model = settings.openrouter_model
+        self.router = ModelRouter(
+            {
+                "analysis": settings.openrouter_model_analysis,
+                "themes": settings.openrouter_model_themes,
+                "cv_json": settings.openrouter_model_cv_json,
+                "letter": settings.openrouter_model_letter,
+            },
+            default_model=self.model,
+            fallback_models=[m.strip() for m in settings.openrouter_fallback_models.split(',') if m.strip()],
+            latency_routing=settings.openrouter_latency_routing,
+            cooldown=settings.openrouter_model_cooldown
+        )
+        self._session: Optional[aiohttp.ClientSession] = None
+
+        # Appels doublés après le p90 de l'étape (requêtes non streamées)
+        self.hedge_stages = {stage.strip() for stage in settings.openrouter_hedge_stages.split(',') if stage.strip()}
+        self.hedge_stats = {'eligible': 0, 'launched': 0, 'won': 0}
+
+        # Cache disque des réponses (branché par l'orchestrateur) et étapes concernées
+        self.response_cache: Optional[ResponseCache] = None
+        self.cache_stages = {stage.strip() for stage in settings.response_cache_stages.split(',') if stage.strip()}
+
+        # Délais avant le premier token des appels en streaming (secondes)
+        self.ttft_samples: list = []
+
+        # Limites de débit (0 = illimité) et concurrence adaptative selon les 429
+        self.request_bucket = TokenBucket(settings.openrouter_requests_per_minute)
+        self.token_bucket = TokenBucket(settings.openrouter_tokens_per_minute)
+        self.concurrency = AIMDLimiter(
+            initial=settings.max_concurrent_llm_calls,
+            minimum=settings.openrouter_min_concurrency,
+            # Au-delà du pool de connexions, les requêtes attendraient une connexion
+            # une fois leur place obtenue (et fausseraient les latences mesurées)
+            maximum=min(settings.openrouter_max_concurrency, settings.openrouter_pool_limit_per_host),
+            target_ratio=settings.openrouter_rate_limit_target
+        )
 
         if not self.api_key:
             raise ValueError("OPENROUTER_API_KEY non définie dans l'environnement")
 
+    async def __aenter__(self) -> "OpenRouterClient":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """
+        Retourne la session partagée, créée à la première utilisation
+
+        La session doit être créée dans une boucle asyncio active, d'où
+        l'initialisation paresseuse plutôt que dans __init__.
+        """
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=settings.openrouter_pool_limit,
+                limit_per_host=settings.openrouter_pool_limit_per_host,
+                keepalive_timeout=settings.openrouter_keepalive_timeout,
+                use_dns_cache=True,
+                ttl_dns_cache=settings.openrouter_dns_cache_ttl
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=settings.openrouter_timeout),
+                headers={
+                    "Authorization": f"Bearer {self.api_key}",
+                    "Content-Type": "application/json",
+                    "HTTP-Referer": "https://cv-generator.local",
+                    "X-Title": "CV & Lettre Generator"
+                }
+            )
+        return self._session
+
+    async def close(self):
+        """Ferme la session et libère le pool de connexions"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def model_for(self, stage: Optional[str]) -> str:
+        """Modèle principal configuré pour une étape (analysis, themes, cv_json, letter)"""
+        return self.router.primary(stage)
+
+    def _models(self, model: Optional[str], stage: Optional[str]) -> List[str]:
+        """Modèles à essayer: le modèle imposé, sinon la chaîne de l'étape"""
+        return [model] if model else self.router.chain(stage)
+
+    def _retries_for(self, index: int, models: List[str]) -> int:
+        """Nouvelles tentatives sur un modèle: réduites s'il reste un repli"""
+        if index < len(models) - 1:
+            return min(settings.openrouter_max_retries, settings.openrouter_retries_before_fallback)
+        return settings.openrouter_max_retries
+
+    @staticmethod
+    def _should_fall_back(error: Exception) -> bool:
+        """Indique si une erreur justifie d'essayer le modèle suivant"""
+        if isinstance(error, OpenRouterError):
+            return isinstance(error, OpenRouterRateLimitError) or error.status in FALLBACK_STATUSES
+        return isinstance(error, (aiohttp.ClientError, asyncio.TimeoutError))
+
     async def chat_completion(
         self,
         messages: list,
         model: Optional[str] = None,
         temperature: float = 0.7,
         max_tokens: int = 4000,
-        stream: bool = False
+        stream: bool = False,
+        response_format: Optional[Dict[str, Any]] = None,
+        stage: Optional[str] = None,
+        validate: Optional[Callable[[Dict[str, Any]], Any]] = None,
+        use_cache: bool = True
     ) -> Dict[str, Any]:
         """
         Effectue un appel de completion via OpenRouter
 
+        Les appels passent par les limiteurs du client (requêtes et tokens
+        par minute, concurrence adaptative) et sont relancés sur 429, 5xx
+        ou erreur réseau. Sans modèle imposé, le modèle de l'étape est
+        utilisé, puis la chaîne de repli s'il reste indisponible.
+
         Args:
             messages: Liste des messages [{"role": "user", "content": "..."}]
-            model: Modèle à utiliser (défaut: deepseek/deepseek-v3.2-exp)
+            model: Modèle à utiliser (défaut: modèle de l'étape)
             temperature: Créativité de la réponse
             max_tokens: Nombre max de tokens
-            stream: Streaming ou non
+            stream: Reçoit la réponse en streaming (SSE) puis la réassemble
+            response_format: Format de réponse imposé (ex: {"type": "json_object"})
+            stage: Étape du pipeline (analysis, themes, cv_json, letter)
+            validate: Vérifie la réponse avant sa mise en cache (lève une
+                exception si elle est inutilisable: elle n'est alors pas conservée)
+            use_cache: Lit le cache des réponses; à False, l'appel est refait
+                mais sa réponse remplace l'entrée en cache
 
         Returns:
             Réponse de l'API
+
+        Raises:
+            OpenRouterError: Si tous les modèles candidats ont échoué
         """
-        model = model or self.model
+        if stream:
+            parts = []
+            async for delta in self.stream_chat_completion(
+                messages, model=model, temperature=temperature,
+                max_tokens=max_tokens, response_format=response_format, stage=stage,
+                use_cache=use_cache
+            ):
+                parts.append(delta)
+            return {
+                "model": model or self.model_for(stage),
+                "choices": [{"message": {"role": "assistant", "content": "".join(parts)}}]
+            }
 
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json",
-            "HTTP-Referer": "https://cv-generator.local",
-            "X-Title": "CV & Lettre Generator"
-        }
+        cache_key = self._cache_key(messages, model, temperature, max_tokens, response_format, stage)
+        if cache_key is not None and use_cache:
+            cached = await asyncio.to_thread(self.response_cache.get, cache_key, stage)
+            if cached is not None:
+                try:
+                    if validate is not None:
+                        validate(cached)
+                    return cached
+                except Exception as e:
+                    logger.warning(f"Réponse en cache inutilisable ({e}), nouvel appel")
+
+        models = self._models(model, stage)
+        delay = self._hedge_delay(stage) if model is None else None
+        if delay is None:
+            result = await self._complete(messages, models, temperature, max_tokens, response_format, stage)
+        else:
+            result = await self._hedged_complete(messages, models, temperature, max_tokens, response_format, stage, delay)
+
+        if validate is not None:
+            validate(result)
+        if cache_key is not None and result.get("choices") and result["choices"][0]["message"].get("content"):
+            await asyncio.to_thread(self.response_cache.put, cache_key, result, stage)
+        return result
+
+    def _cache_key(
+        self,
+        messages: list,
+        model: Optional[str],
+        temperature: float,
+        max_tokens: int,
+        response_format: Optional[Dict[str, Any]],
+        stage: Optional[str]
+    ) -> Optional[str]:
+        """
+        Clé du cache des réponses pour cet appel
+
+        Le modèle retenu est celui demandé (ou le modèle principal de
+        l'étape), pas celui qui a finalement répondu après un repli.
 
+        Returns:
+            Empreinte de la requête, ou None si l'étape n'est pas mise en cache
+        """
+        if self.response_cache is None or stage not in self.cache_stages:
+            return None
+        return request_key(messages, model or self.model_for(stage), temperature, max_tokens, response_format)
+
+    async def _complete(
+        self,
+        messages: list,
+        models: List[str],
+        temperature: float,
+        max_tokens: int,
+        response_format: Optional[Dict[str, Any]],
+        stage: Optional[str],
+        sent: Optional[asyncio.Event] = None
+    ) -> Dict[str, Any]:
+        """
+        Essaie les modèles dans l'ordre jusqu'au premier succès
+
+        La latence enregistrée pour le modèle est celle de la tentative HTTP
+        réussie, sans l'attente locale (limiteurs, backoff entre tentatives).
+
+        Args:
+            sent: Événement signalé dès qu'une requête part vers le serveur
+        """
+        for index, candidate in enumerate(models):
+            payload = self._payload(messages, candidate, temperature, max_tokens, False, response_format)
+            try:
+                result, latency = await self._post(payload, self._retries_for(index, models), sent=sent)
+            except Exception as e:
+                if not self._should_fall_back(e):
+                    raise
+                self.router.record_failure(stage, candidate)
+                if index == len(models) - 1:
+                    raise
+                logger.warning(f"Repli de {candidate} sur {models[index + 1]} ({e})")
+                continue
+
+            self.router.record_success(stage, candidate, latency)
+            return result
+
+    def _hedge_delay(self, stage: Optional[str]) -> Optional[float]:
+        """
+        Délai après lequel doubler un appel de cette étape
+
+        Returns:
+            p90 des durées observées pour l'étape (au moins OPENROUTER_HEDGE_MIN_DELAY),
+            ou None si le doublement est désactivé ou les mesures insuffisantes
+        """
+        if not settings.openrouter_hedging or stage not in self.hedge_stages:
+            return None
+        p90 = self.router.latency_percentile(stage, 0.9, min_samples=settings.openrouter_hedge_min_samples)
+        if p90 is None:
+            return None
+        return max(settings.openrouter_hedge_min_delay, p90)
+
+    async def _hedged_complete(
+        self,
+        messages: list,
+        models: List[str],
+        temperature: float,
+        max_tokens: int,
+        response_format: Optional[Dict[str, Any]],
+        stage: Optional[str],
+        delay: float
+    ) -> Dict[str, Any]:
+        """
+        Appel doublé: si la réponse tarde au-delà de `delay`, une copie part
+        vers le premier modèle de repli sain (ou le même modèle); la première
+        réponse réussie gagne et l'autre appel est annulé
+
+        Le délai court à partir de l'envoi effectif de la requête: un appel
+        encore en attente dans les limiteurs du client n'est pas doublé, ni un
+        appel lent quand toutes les places de concurrence sont occupées. Le
+        nombre de copies reste sous OPENROUTER_HEDGE_MAX_RATIO fois le
+        nombre d'appels éligibles, pour plafonner la dépense supplémentaire.
+        Quand la copie gagne, la durée écoulée de l'appel initial est
+        enregistrée comme borne basse: le p90 ne dérive pas vers le bas.
+        """
+        self.hedge_stats['eligible'] += 1
+        sent = asyncio.Event()
+        primary = asyncio.create_task(
+            self._complete(messages, models, temperature, max_tokens, response_format, stage, sent=sent)
+        )
+        sent_wait = asyncio.create_task(sent.wait())
+        tasks = [primary, sent_wait]
+        try:
+            await asyncio.wait({primary, sent_wait}, return_when=asyncio.FIRST_COMPLETED)
+            if primary.done():
+                return await primary
+            sent_at = time.monotonic()
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+            budget = settings.openrouter_hedge_max_ratio * self.hedge_stats['eligible']
+            # Sans place de concurrence libre, la copie attendrait dans la même file
+            saturated = self.concurrency.in_flight >= int(self.concurrency.limit)
+            if done or saturated or self.hedge_stats['launched'] + 1 > budget:
+                return await primary
+
+            backups = [m for m in models[1:] if self.router.is_healthy(m)]
+            hedge_model = backups[0] if backups else models[0]
+            logger.info(f"Appel {stage} sans réponse après {delay:.1f}s, doublé vers {hedge_model}")
+            self.hedge_stats['launched'] += 1
+            hedge = asyncio.create_task(
+                self._complete(messages, [hedge_model], temperature, max_tokens, response_format, stage)
+            )
+            tasks.append(hedge)
+
+            pending = {primary, hedge}
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self.hedge_stats['won'] += 1
+                            if not primary.done():
+                                self.router.record_censored(stage, time.monotonic() - sent_at)
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    async def _post(
+        self,
+        payload: Dict[str, Any],
+        max_retries: int,
+        sent: Optional[asyncio.Event] = None
+    ) -> Tuple[Dict[str, Any], float]:
+        """
+        Envoie une requête non streamée avec limitation de débit et nouvelles tentatives
+
+        Args:
+            payload: Corps de la requête
+            max_retries: Nombre de nouvelles tentatives
+            sent: Événement signalé quand la requête part (place de concurrence obtenue)
+
+        Returns:
+            (réponse de l'API, durée de la tentative réussie en secondes)
+        """
+        for attempt in range(max_retries + 1):
+            await self._throttle(payload)
+            try:
+                async with self.concurrency.slot():
+                    started = time.monotonic()
+                    if sent is not None:
+                        sent.set()
+                    session = self._get_session()
+                    async with session.post(f"{self.base_url}/chat/completions", json=payload) as response:
+                        await self._raise_for_status(response)
+                        result = await response.json()
+                    latency = time.monotonic() - started
+            except Exception as e:
+                await self._before_retry(e, attempt, max_retries)
+                continue
+
+            self.concurrency.on_success()
+            self._log_usage(result.get("usage"))
+            return result, latency
+
+    def _payload(
+        self,
+        messages: list,
+        model: Optional[str],
+        temperature: float,
+        max_tokens: int,
+        stream: bool,
+        response_format: Optional[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """Corps de la requête /chat/completions"""
         payload = {
-            "model": model,
+            "model": model or self.model,
             "messages": messages,
             "temperature": temperature,
             "max_tokens": max_tokens,
             "stream": stream
         }
+        if response_format:
+            payload["response_format"] = response_format
+        return payload
+
+    async def _throttle(self, payload: Dict[str, Any]):
+        """
+        Attend que les seaux requêtes/minute et tokens/minute autorisent l'appel
+
+        Le coût en tokens est estimé comme le prompt plus max_tokens, à la
+        manière des fournisseurs qui réservent la réponse maximale.
+        """
+        await self.request_bucket.acquire(1)
+        if self.token_bucket.rate > 0:
+            prompt_text = "".join(
+                part.get("text", "") if isinstance(part, dict) else str(part)
+                for message in payload["messages"]
+                for part in (message["content"] if isinstance(message["content"], list) else [message["content"]])
+            )
+            await self.token_bucket.acquire(estimate_tokens(prompt_text) + payload["max_tokens"])
+
+    async def _raise_for_status(self, response: aiohttp.ClientResponse):
+        """Convertit une réponse non-200 en OpenRouterError (ou OpenRouterRateLimitError sur 429)"""
+        if response.status == 200:
+            return
+        error_text = await response.text()
+        retry_after = parse_retry_after(response.headers.get("Retry-After"))
+        if response.status == 429:
+            raise OpenRouterRateLimitError(response.status, error_text, retry_after)
+        raise OpenRouterError(response.status, error_text, retry_after)
+
+    async def _before_retry(self, error: Exception, attempt: int, max_retries: int):
+        """
+        Décide si un appel échoué est relancé et attend le délai nécessaire
+
+        Délai: backoff exponentiel avec jitter complet, au moins la valeur de
+        Retry-After si le serveur en donne une.
+
+        Raises:
+            L'erreur d'origine si elle n'est pas transitoire ou si les
+            tentatives sont épuisées
+        """
+        if isinstance(error, OpenRouterRateLimitError):
+            self.concurrency.on_rate_limited()
+        elif isinstance(error, OpenRouterError):
+            if error.status not in RETRYABLE_STATUSES:
+                raise error
+            self.concurrency.on_error()
+        elif isinstance(error, (aiohttp.ClientError, asyncio.TimeoutError)):
+            self.concurrency.on_error()
+        else:
+            raise error
+
+        if attempt >= max_retries:
+            raise error
+
+        backoff = min(settings.openrouter_retry_max_delay, settings.openrouter_retry_base_delay * 2 ** attempt)
+        delay = random.uniform(0, backoff)
+        retry_after = getattr(error, "retry_after", None)
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, settings.openrouter_retry_max_delay))
+        logger.warning(
+            f"Appel OpenRouter échoué ({error}), nouvelle tentative dans {delay:.1f}s "
+            f"({attempt + 1}/{max_retries})"
+        )
+        await asyncio.sleep(delay)
+
+    def _log_usage(self, usage: Optional[Dict[str, Any]]):
+        """Journalise les tokens du prompt servis depuis le cache du fournisseur (si communiqués)"""
+        usage = usage or {}
+        cached = (usage.get("prompt_tokens_details") or {}).get("cached_tokens")
+        if cached:
+            logger.info(f"Cache de prompt: {cached}/{usage.get('prompt_tokens')} tokens réutilisés")
+
+    async def stream_chat_completion(
+        self,
+        messages: list,
+        model: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 4000,
+        response_format: Optional[Dict[str, Any]] = None,
+        stage: Optional[str] = None,
+        use_cache: bool = True
+    ) -> AsyncIterator[str]:
+        """
+        Effectue un appel de completion en streaming (Server-Sent Events)
+
+        Les fragments de texte sont produits au fur et à mesure de leur
+        arrivée; le délai avant le premier fragment est mesuré. Un appel
+        n'est relancé (ou redirigé vers un modèle de repli) que tant
+        qu'aucun fragment n'a été produit.
+
+        Usage:
+            async for delta in client.stream_chat_completion(messages):
+                print(delta, end="")
+
+        Args:
+            messages: Liste des messages [{"role": "user", "content": "..."}]
+            model: Modèle à utiliser (défaut: modèle de l'étape)
+            temperature: Créativité de la réponse
+            max_tokens: Nombre max de tokens
+            response_format: Format de réponse imposé
+            stage: Étape du pipeline (analysis, themes, cv_json, letter)
+            use_cache: Lit le cache des réponses (la réponse est mise en cache dans tous les cas)
+
+        Yields:
+            Fragments du contenu généré
+        """
+        cache_key = self._cache_key(messages, model, temperature, max_tokens, response_format, stage)
+        if cache_key is not None and use_cache:
+            cached = await asyncio.to_thread(self.response_cache.get, cache_key, stage)
+            if cached is not None:
+                yield cached["choices"][0]["message"]["content"]
+                return
+
+        models = self._models(model, stage)
+        parts = []
+        for index, candidate in enumerate(models):
+            payload = self._payload(messages, candidate, temperature, max_tokens, True, response_format)
+            timing: Dict[str, float] = {}
+            produced = False
+            try:
+                async for delta in self._stream(payload, self._retries_for(index, models), timing=timing):
+                    produced = True
+                    parts.append(delta)
+                    yield delta
+            except Exception as e:
+                if produced or not self._should_fall_back(e):
+                    raise
+                self.router.record_failure(stage, candidate)
+                if index == len(models) - 1:
+                    raise
+                logger.warning(f"Repli de {candidate} sur {models[index + 1]} ({e})")
+                continue
+
+            self.router.record_success(stage, candidate, timing['latency'])
+            if cache_key is not None and parts:
+                response = {
+                    "model": candidate,
+                    "choices": [{"message": {"role": "assistant", "content": "".join(parts)}}]
+                }
+                await asyncio.to_thread(self.response_cache.put, cache_key, response, stage)
+            return
+
+    async def _stream(
+        self,
+        payload: Dict[str, Any],
+        max_retries: int,
+        timing: Optional[Dict[str, float]] = None
+    ) -> AsyncIterator[str]:
+        """
+        Envoie une requête streamée avec limitation de débit et nouvelles tentatives
+
+        Les durées (premier token, tentative complète) sont mesurées à partir
+        de l'obtention de la place de concurrence, sans l'attente locale.
+
+        Args:
+            payload: Corps de la requête
+            max_retries: Nombre de nouvelles tentatives
+            timing: Reçoit 'latency', la durée de la tentative réussie (secondes)
+        """
+        for attempt in range(max_retries + 1):
+            await self._throttle(payload)
+            first_token = True
+            try:
+                async with self.concurrency.slot():
+                    started = time.monotonic()
+                    session = self._get_session()
+                    async with session.post(f"{self.base_url}/chat/completions", json=payload) as response:
+                        await self._raise_for_status(response)
+
+                        # Une ligne "data: {...}" par événement; les lignes ": ..." sont des keep-alive
+                        async for raw_line in response.content:
+                            line = raw_line.decode('utf-8').strip()
+                            if not line.startswith("data:"):
+                                continue
+                            data = line[len("data:"):].strip()
+                            if data == "[DONE]":
+                                break
+
+                            chunk = json.loads(data)
+                            if "error" in chunk:
+                                raise OpenRouterError(
+                                    chunk["error"].get("code", 0) if isinstance(chunk["error"], dict) else 0,
+                                    f"Erreur pendant le streaming: {chunk['error']}"
+                                )
+                            if chunk.get("usage"):
+                                self._log_usage(chunk["usage"])
+
+                            for choice in chunk.get("choices", []):
+                                delta = (choice.get("delta") or {}).get("content")
+                                if not delta:
+                                    continue
+                                if first_token:
+                                    first_token = False
+                                    self._record_ttft(time.monotonic() - started)
+                                yield delta
+            except Exception as e:
+                # Une partie de la réponse a déjà été transmise: impossible de relancer
+                if not first_token:
+                    raise
+                await self._before_retry(e, attempt, max_retries)
+                continue
+
+            if timing is not None:
+                timing['latency'] = time.monotonic() - started
+            self.concurrency.on_success()
+            return
+
+    async def stream_to_file(self, messages: list, output_path: Path, **kwargs) -> str:
+        """
+        Écrit une completion en streaming dans un fichier, au fil de l'eau
+
+        La génération est écrite dans `<fichier>.part`, lisible pendant
+        l'appel (ex: tail -f), puis renommée en une fois sur le fichier final
+        en cas de succès. En cas d'échec, seul le fichier partiel est
+        supprimé: une version précédente du fichier reste intacte.
+
+        Args:
+            messages: Liste des messages
+            output_path: Fichier de sortie
+            **kwargs: Paramètres de stream_chat_completion
+
+        Returns:
+            Contenu complet généré
+        """
+        output_path = Path(output_path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        part_path = output_path.with_name(output_path.name + '.part')
+        parts = []
+        try:
+            async with aiofiles.open(part_path, 'w', encoding='utf-8') as f:
+                async for delta in self.stream_chat_completion(messages, **kwargs):
+                    parts.append(delta)
+                    await f.write(delta)
+                    await f.flush()
+            os.replace(part_path, output_path)
+        except BaseException:
+            part_path.unlink(missing_ok=True)
+            raise
+        return "".join(parts)
 
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                f"{self.base_url}/chat/completions",
-                headers=headers,
-                json=payload
-            ) as response:
-                if response.status != 200:
-                    error_text = await response.text()
-                    raise Exception(f"Erreur OpenRouter {response.status}: {error_text}")
+    def _record_ttft(self, elapsed: float):
+        """Enregistre le délai avant le premier token d'un appel en streaming"""
+        self.ttft_samples.append(elapsed)
+        logger.info(f"Premier token après {elapsed:.2f}s")
 
-                return await response.json()
+    def ttft_stats(self) -> Dict[str, float]:
+        """
+        Statistiques des délais avant le premier token
 
-    async def analyze_offer(self, offer_content: str, analysis_prompt: str) -> str:
+        Returns:
+            {'count', 'mean', 'p50', 'p90', 'max'} en secondes (vide si aucun échantillon)
+        """
+        samples = sorted(self.ttft_samples)
+        if not samples:
+            return {}
+        return {
+            'count': len(samples),
+            'mean': statistics.fmean(samples),
+            'p50': samples[int(0.5 * (len(samples) - 1))],
+            'p90': samples[int(0.9 * (len(samples) - 1))],
+            'max': samples[-1]
+        }
+
+    async def analyze_offer(
+        self,
+        offer_content: str,
+        analysis_prompt: str,
+        output_path: Optional[Path] = None,
+        use_cache: bool = True
+    ) -> str:
         """
         Analyse une offre d'emploi avec l'IA
 
         Args:
             offer_content: Contenu brut de l'offre
             analysis_prompt: Prompt d'analyse spécifique
+            output_path: Fichier où écrire l'analyse au fil de l'eau (streaming)
+            use_cache: Réutilise une réponse en cache (False pour forcer un nouvel appel)
 
         Returns:
             Analyse structurée en markdown
@@ -104,32 +818,93 @@ class OpenRouterClient:
             }
         ]
 
-        response = await self.chat_completion(messages)
+        if output_path is not None and settings.openrouter_stream:
+            return await self.stream_to_file(messages, output_path, stage="analysis", use_cache=use_cache)
+
+        response = await self.chat_completion(messages, stage="analysis", use_cache=use_cache)
         return response["choices"][0]["message"]["content"]
 
-    async def generate_themes(self, offer_analysis: str) -> list:
+    async def analyze_offer_structured(
+        self,
+        offer_content: str,
+        analysis_prompt: str,
+        use_cache: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Analyse une offre et extrait ses thèmes en un seul appel
+
+        Le modèle répond en JSON (sections du rapport + thèmes); le rapport
+        est ensuite reconstruit en markdown.
+
+        Args:
+            offer_content: Contenu brut de l'offre
+            analysis_prompt: Prompt d'analyse spécifique
+            use_cache: Réutilise une réponse en cache (False pour forcer un nouvel appel)
+
+        Returns:
+            {'analysis': str (markdown), 'themes': list}
+
+        Raises:
+            ValueError: Si la réponse ne respecte pas le schéma attendu
+        """
+        messages = [
+            {
+                "role": "system",
+                "content": "Tu es un expert en analyse de recrutement. Tu analyses les offres d'emploi de manière structurée et précise. Tu réponds uniquement en JSON."
+            },
+            {
+                "role": "user",
+                "content": f"{analysis_prompt}\n{STRUCTURED_ANALYSIS_INSTRUCTIONS}\nOFFRE À ANALYSER:\n{offer_content}"
+            }
+        ]
+
+        def parse(response: Dict[str, Any]) -> Dict[str, Any]:
+            try:
+                content = response["choices"][0]["message"]["content"]
+            except (KeyError, IndexError, TypeError):
+                raise ValueError("Réponse sans contenu (choices/message absents)")
+            if not isinstance(content, str) or not content.strip():
+                raise ValueError("Réponse vide")
+            content = content.replace("```json", "").replace("```", "").strip()
+            try:
+                data = json.loads(content)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Réponse JSON invalide: {e}")
+            return parse_structured_analysis(data)
+
+        # Une réponse hors schéma n'est pas mise en cache (elle serait rejouée à chaque exécution)
+        response = await self.chat_completion(
+            messages,
+            response_format={"type": "json_object"},
+            stage="analysis",
+            validate=parse,
+            use_cache=use_cache
+        )
+        return parse(response)
+
+    async def generate_themes(self, offer_analysis: str, use_cache: bool = True) -> list:
         """
         Extrait les thèmes pertinents d'une offre
 
+        Args:
+            offer_analysis: Analyse markdown de l'offre
+            use_cache: Réutilise une réponse en cache (False pour forcer un nouvel appel)
+
         Returns:
             Liste des thèmes sous forme de liste Python
         """
         messages = [
             {
                 "role": "system",
-                "content": "Tu extrais les thèmes et mots-clés d'une offre d'emploi pour contextualiser la génération d'un CV. Réponds UNIQUEMENT avec une liste Python de chaînes."
+                "content": THEMES_SYSTEM_PROMPT
             },
             {
                 "role": "user",
-                "content": f"""Extrait une liste de thèmes/mots-clés pertinents pour contextualiser un CV.
-Format de sortie: ["thème1", "thème2", "thème3"]
-
-Analyse de l'offre:
-{offer_analysis}"""
+                "content": THEMES_USER_PROMPT.format(offer_analysis=offer_analysis)
             }
         ]
 
-        response = await self.chat_completion(messages, temperature=0.3)
+        response = await self.chat_completion(messages, temperature=0.3, stage="themes", use_cache=use_cache)
         content = response["choices"][0]["message"]["content"]
 
         try:
@@ -142,25 +917,24 @@ Analyse de l'offre:
             matches = re.findall(r'"([^"]+)"', content)
             return matches if matches else []
 
-    async def generate_cv_json(self, prompt: str) -> Dict[str, Any]:
+    async def generate_cv_json(self, prompt: str, prefix: Optional[str] = None) -> Dict[str, Any]:
         """
         Génère le JSON du CV au format Reactive Resume
 
+        Args:
+            prompt: Prompt (ou partie propre à l'offre si prefix est fourni)
+            prefix: Partie stable du prompt, placée en tête (cache de prompt)
+
         Returns:
             Dictionnaire JSON du CV
         """
-        messages = [
-            {
-                "role": "system",
-                "content": "Tu génères des CV au format JSON Reactive Resume. Respecte EXACTEMENT la structure fournie dans le guide. Réponds uniquement avec le JSON valide, sansmarkdown."
-            },
-            {
-                "role": "user",
-                "content": prompt
-            }
-        ]
+        messages = prompt_messages(
+            "Tu génères des CV au format JSON Reactive Resume. Respecte EXACTEMENT la structure fournie dans le guide. Réponds uniquement avec le JSON valide, sansmarkdown.",
+            prompt,
+            prefix=prefix
+        )
 
-        response = await self.chat_completion(messages, temperature=0.5, max_tokens=4000)
+        response = await self.chat_completion(messages, temperature=0.5, max_tokens=4000, stage="cv_json")
         content = response["choices"][0]["message"]["content"]
 
         # Parse le JSON
@@ -171,23 +945,94 @@ Analyse de l'offre:
         except json.JSONDecodeError as e:
             raise Exception(f"Erreur parsing JSON: {e}\nContenu: {content[:500]}")
 
-    async def generate_cover_letter(self, prompt: str) -> str:
+    async def generate_cover_letter(
+        self,
+        prompt: str,
+        prefix: Optional[str] = None,
+        output_path: Optional[Path] = None
+    ) -> str:
         """
         Génère une lettre de motivation
 
+        Args:
+            prompt: Prompt (ou partie propre à l'offre si prefix est fourni)
+            prefix: Partie stable du prompt, placée en tête (cache de prompt)
+            output_path: Fichier où écrire la lettre au fil de l'eau (streaming)
+
         Returns:
             Lettre de motivation en Markdown
         """
-        messages = [
-            {
-                "role": "system",
-                "content": "Tu rédiges des lettres de motivation professionnelles, personnalisées et convaincantes en français. Utilise un ton professionnel mais chaleureux."
-            },
-            {
-                "role": "user",
-                "content": prompt
-            }
-        ]
+        messages = prompt_messages(
+            "Tu rédiges des lettres de motivation professionnelles, personnalisées et convaincantes en français. Utilise un ton professionnel mais chaleureux.",
+            prompt,
+            prefix=prefix
+        )
+
+        if output_path is not None and settings.openrouter_stream:
+            return await self.stream_to_file(messages, output_path, temperature=0.7, max_tokens=2000, stage="letter")
 
-        response = await self.chat_completion(messages, temperature=0.7, max_tokens=2000)
+        response = await self.chat_completion(messages, temperature=0.7, max_tokens=2000, stage="letter")
         return response["choices"][0]["message"]["content"]
+
+
+def parse_structured_analysis(data: Any) -> Dict[str, Any]:
+    """
+    Valide une analyse structurée et la convertit en markdown
+
+    Args:
+        data: Objet JSON décodé renvoyé par le modèle
+
+    Returns:
+        {'analysis': str (markdown), 'themes': list}
+
+    Raises:
+        ValueError: Si le schéma n'est pas respecté
+    """
+    if not isinstance(data, dict):
+        raise ValueError("L'analyse structurée doit être un objet JSON")
+
+    sections = data.get("sections")
+    if not isinstance(sections, list) or len(sections) != STRUCTURED_ANALYSIS_SECTIONS:
+        raise ValueError(f"'sections' doit contenir exactement {STRUCTURED_ANALYSIS_SECTIONS} éléments")
+    for section in sections:
+        if not isinstance(section, dict):
+            raise ValueError("Chaque section doit être un objet")
+        for field in ("title", "content"):
+            if not isinstance(section.get(field), str) or not section[field].strip():
+                raise ValueError(f"Champ '{field}' manquant ou vide dans une section")
+
+    summary = data.get("summary")
+    if not isinstance(summary, str) or not summary.strip():
+        raise ValueError("'summary' manquant ou vide")
+
+    themes = data.get("themes")
+    if not isinstance(themes, list) or not themes or not all(isinstance(t, str) for t in themes):
+        raise ValueError("'themes' doit être une liste non vide de chaînes")
+
+    parts = [f"## {s['title'].strip()}\n\n{s['content'].strip()}" for s in sections]
+    parts.append(f"## Résumé Exécutif\n\n{summary.strip()}")
+
+    return {
+        'analysis': "\n\n".join(parts) + "\n",
+        'themes': [t.strip() for t in themes if t.strip()]
+    }
+
+
+# Client partagé par tous les agents du processus
+_shared_client: Optional[OpenRouterClient] = None
+
+
+def get_openrouter_client() -> OpenRouterClient:
+    """Retourne le client OpenRouter partagé (créé à la première demande)"""
+    global _shared_client
+    if _shared_client is None:
+        _shared_client = OpenRouterClient()
+    return _shared_client
+
+
+async def close_openrouter_client():
+    """Ferme le client partagé et son pool de connexions"""
+    global _shared_client
+    if _shared_client is not None:
+        await _shared_client.close()
+        _shared_client = None
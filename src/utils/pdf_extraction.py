@@ -0,0 +1,105 @@
+"""
+Extraction du texte des PDF dans un pool de processus
+PyPDF2 est synchrone et gourmand en CPU: l'exécuter hors de la boucle asyncio
+évite de bloquer les autres coroutines pendant l'extraction.
+"""
+
+import asyncio
+import math
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import PyPDF2
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from config.settings import settings
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+def _extract_page_range(pdf_path: str, start: int, end: Optional[int]) -> Tuple[int, List[str]]:
+    """
+    Extrait le texte des pages [start, end) d'un PDF (exécuté dans un worker)
+
+    Args:
+        pdf_path: Chemin du PDF
+        start: Index de la première page
+        end: Index de fin exclu (None = jusqu'à la dernière page)
+
+    Returns:
+        (nombre total de pages, textes des pages extraites)
+    """
+    with open(pdf_path, 'rb') as file:
+        pdf_reader = PyPDF2.PdfReader(file)
+        page_count = len(pdf_reader.pages)
+        end = page_count if end is None else min(end, page_count)
+        texts = [pdf_reader.pages[i].extract_text() for i in range(start, end)]
+    return page_count, texts
+
+
+def get_pdf_executor() -> ProcessPoolExecutor:
+    """Retourne le pool de processus partagé (créé à la première demande)"""
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=max(1, settings.pdf_extraction_workers))
+    return _executor
+
+
+def shutdown_pdf_executor():
+    """Arrête le pool de processus partagé"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
+
+
+async def extract_pdf_pages(pdf_path: Path) -> List[str]:
+    """
+    Extrait le texte de chaque page d'un PDF sans bloquer la boucle asyncio
+
+    Les premières pages (jusqu'au seuil configuré) sont extraites en un seul
+    aller-retour; pour les documents plus longs, les pages restantes sont
+    réparties entre les workers et extraites en parallèle.
+
+    Args:
+        pdf_path: Chemin vers le fichier PDF
+
+    Returns:
+        Liste des textes, une entrée par page
+    """
+    loop = asyncio.get_running_loop()
+    executor = get_pdf_executor()
+    threshold = max(1, settings.pdf_parallel_page_threshold)
+
+    page_count, pages = await loop.run_in_executor(
+        executor, _extract_page_range, str(pdf_path), 0, threshold
+    )
+    if page_count <= threshold:
+        return pages
+
+    workers = max(1, settings.pdf_extraction_workers)
+    chunk_size = math.ceil((page_count - threshold) / workers)
+    chunks = await asyncio.gather(*(
+        loop.run_in_executor(executor, _extract_page_range, str(pdf_path), start, start + chunk_size)
+        for start in range(threshold, page_count, chunk_size)
+    ))
+    for _, chunk_pages in chunks:
+        pages.extend(chunk_pages)
+    return pages
+
+
+def build_pdf_text(pages: List[str]) -> str:
+    """
+    Assemble le texte des pages avec un marqueur par page
+
+    Args:
+        pages: Textes des pages, dans l'ordre
+
+    Returns:
+        Texte complet du document
+    """
+    return "\n\n".join(
+        f"--- Page {page_num + 1} ---\n{text}" for page_num, text in enumerate(pages)
+    ).strip()
@@ -0,0 +1,141 @@
+"""
+Cache persistant du texte extrait des PDF
+Évite de ré-analyser avec PyPDF2 un PDF qui n'a pas changé entre deux exécutions
+"""
+
+import hashlib
+import logging
+import sqlite3
+import time
+import zlib
+from contextlib import contextmanager
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    sha256 TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS documents (
+    sha256 TEXT PRIMARY KEY,
+    page_count INTEGER NOT NULL,
+    extracted_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS pages (
+    sha256 TEXT NOT NULL,
+    page_num INTEGER NOT NULL,
+    text BLOB NOT NULL,
+    PRIMARY KEY (sha256, page_num)
+);
+"""
+
+
+def file_sha256(path: Path, chunk_size: int = 1024 * 1024) -> str:
+    """Calcule le SHA-256 d'un fichier par blocs"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class PdfTextCache:
+    """
+    Cache SQLite du texte des PDF, page par page
+
+    Un PDF est identifié par le hash de son contenu. La table `files` mémorise
+    (chemin, taille, mtime) → hash pour éviter de relire le fichier quand il
+    n'a pas été modifié; un fichier déplacé ou simplement "touché" est
+    retrouvé par son hash sans nouvelle extraction.
+
+    Les méthodes sont synchrones: les appeler via asyncio.to_thread depuis
+    du code asynchrone.
+    """
+
+    def __init__(self, db_path: Path):
+        """
+        Args:
+            db_path: Chemin de la base SQLite (créée si nécessaire)
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        """Ouvre une connexion (une par appel, utilisable depuis n'importe quel thread)"""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def lookup(self, pdf_path: Path) -> Tuple[str, Optional[List[str]]]:
+        """
+        Recherche le texte d'un PDF dans le cache
+
+        Args:
+            pdf_path: Chemin du PDF
+
+        Returns:
+            (hash du contenu, textes des pages ou None si absent du cache)
+        """
+        pdf_path = Path(pdf_path)
+        stat = pdf_path.stat()
+        key = str(pdf_path.resolve())
+
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT size, mtime_ns, sha256 FROM files WHERE path = ?", (key,)
+            ).fetchone()
+
+            if row and row[0] == stat.st_size and row[1] == stat.st_mtime_ns:
+                sha256 = row[2]
+            else:
+                sha256 = file_sha256(pdf_path)
+                conn.execute(
+                    "INSERT OR REPLACE INTO files (path, size, mtime_ns, sha256) VALUES (?, ?, ?, ?)",
+                    (key, stat.st_size, stat.st_mtime_ns, sha256)
+                )
+
+            document = conn.execute(
+                "SELECT page_count FROM documents WHERE sha256 = ?", (sha256,)
+            ).fetchone()
+            if document is None:
+                return sha256, None
+
+            rows = conn.execute(
+                "SELECT text FROM pages WHERE sha256 = ? ORDER BY page_num", (sha256,)
+            ).fetchall()
+
+        if len(rows) != document[0]:
+            logger.warning(f"Entrée incomplète dans le cache PDF pour {pdf_path}, ré-extraction")
+            return sha256, None
+
+        return sha256, [zlib.decompress(text).decode('utf-8') for (text,) in rows]
+
+    def store(self, sha256: str, pages: List[str]):
+        """
+        Enregistre le texte des pages d'un PDF
+
+        Args:
+            sha256: Hash du contenu renvoyé par lookup
+            pages: Textes des pages, dans l'ordre
+        """
+        with self._connect() as conn:
+            conn.execute("DELETE FROM pages WHERE sha256 = ?", (sha256,))
+            conn.executemany(
+                "INSERT INTO pages (sha256, page_num, text) VALUES (?, ?, ?)",
+                [(sha256, num, zlib.compress(text.encode('utf-8'))) for num, text in enumerate(pages)]
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO documents (sha256, page_count, extracted_at) VALUES (?, ?, ?)",
+                (sha256, len(pages), time.time())
+            )
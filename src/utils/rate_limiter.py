@@ -0,0 +1,187 @@
+"""
+Limitation de débit côté client pour les appels OpenRouter
+- TokenBucket: requêtes et tokens par minute
+- AIMDLimiter: concurrence ajustée selon les 429 observés
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """
+    Seau à jetons: débit moyen de `rate_per_minute` avec rafales jusqu'à `capacity`
+
+    Un débit de 0 désactive la limitation. Les demandeurs sont servis dans
+    l'ordre d'arrivée.
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        """
+        Args:
+            rate_per_minute: Jetons ajoutés par minute (0 = illimité)
+            capacity: Taille du seau (défaut: une minute de débit)
+        """
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount: float = 1.0):
+        """
+        Attend que `amount` jetons soient disponibles puis les consomme
+
+        Une demande plus grande que le seau est ramenée à sa capacité pour
+        ne jamais bloquer indéfiniment.
+        """
+        if self.rate <= 0:
+            return
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            self._refill()
+            while self.tokens < amount:
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= amount
+
+
+class AIMDLimiter:
+    """
+    Limite de concurrence adaptative (Additive Increase, Multiplicative Decrease)
+
+    Le contrôleur suit le taux de 429 sur une fenêtre glissante de `window`
+    secondes. Tant qu'il reste sous `target_ratio`, chaque succès augmente
+    la limite d'environ 1 par "tour" complet (+increase / limite). Dès qu'un
+    429 le fait dépasser la cible, la limite est multipliée par `decrease`,
+    au plus une fois par `cooldown` secondes pour qu'une rafale de 429
+    provoqués par le même pic ne l'effondre pas. Les erreurs serveur (5xx,
+    délais dépassés) comptent dans la fenêtre mais ne font ni monter ni
+    baisser la limite. La limite reste entre `minimum` et `maximum`.
+
+    Usage:
+        limiter = AIMDLimiter(initial=4, maximum=16)
+        async with limiter.slot():
+            ...
+        limiter.on_success()  # ou limiter.on_rate_limited() / limiter.on_error()
+    """
+
+    def __init__(
+        self,
+        initial: float,
+        minimum: float = 1.0,
+        maximum: float = 16.0,
+        increase: float = 1.0,
+        decrease: float = 0.5,
+        cooldown: float = 2.0,
+        window: float = 60.0,
+        target_ratio: float = 0.05
+    ):
+        """
+        Args:
+            initial: Limite de départ
+            minimum: Limite minimale
+            maximum: Limite maximale
+            increase: Augmentation par tour de requêtes réussies
+            decrease: Facteur appliqué quand le taux de 429 dépasse la cible
+            cooldown: Délai minimal entre deux réductions (secondes)
+            window: Fenêtre de calcul du taux de 429 (secondes)
+            target_ratio: Taux de 429 toléré sur la fenêtre
+        """
+        self.minimum = max(1.0, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = min(self.maximum, max(self.minimum, float(initial)))
+        self.increase = increase
+        self.decrease = decrease
+        self.cooldown = cooldown
+        self.window = window
+        self.target_ratio = target_ratio
+        self.in_flight = 0
+        self.requests = 0
+        self.rate_limited = 0
+        self.errors = 0
+        self._last_decrease = 0.0
+        self._outcomes: deque = deque()
+        self._condition = asyncio.Condition()
+
+    async def acquire(self):
+        """Attend une place libre sous la limite courante"""
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+
+    async def release(self):
+        """Libère une place"""
+        async with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    @asynccontextmanager
+    async def slot(self):
+        """Occupe une place pendant la durée du bloc"""
+        await self.acquire()
+        try:
+            yield
+        finally:
+            await self.release()
+
+    def _record(self, limited: bool):
+        now = time.monotonic()
+        self.requests += 1
+        self._outcomes.append((now, limited))
+        while self._outcomes and now - self._outcomes[0][0] > self.window:
+            self._outcomes.popleft()
+
+    def on_success(self):
+        """Requête réussie: augmentation additive si le taux de 429 est sous la cible"""
+        self._record(False)
+        if self.rate_limited_ratio() <= self.target_ratio:
+            self.limit = min(self.maximum, self.limit + self.increase / self.limit)
+
+    def on_rate_limited(self):
+        """429 reçu: diminution multiplicative si le taux de 429 dépasse la cible"""
+        self._record(True)
+        self.rate_limited += 1
+        ratio = self.rate_limited_ratio()
+        now = time.monotonic()
+        if ratio > self.target_ratio and now - self._last_decrease >= self.cooldown:
+            self._last_decrease = now
+            self.limit = max(self.minimum, self.limit * self.decrease)
+            logger.info(f"Taux de 429 à {ratio:.0%}, concurrence OpenRouter réduite à {int(self.limit)}")
+
+    def on_error(self):
+        """Erreur serveur ou délai dépassé: comptée dans la fenêtre, limite inchangée"""
+        self._record(False)
+        self.errors += 1
+
+    def rate_limited_ratio(self) -> float:
+        """Part des requêtes récentes (fenêtre glissante) refusées par un 429"""
+        if not self._outcomes:
+            return 0.0
+        return sum(1 for _, limited in self._outcomes if limited) / len(self._outcomes)
+
+    def stats(self) -> Dict[str, float]:
+        """
+        État du limiteur
+
+        Returns:
+            {'limit', 'requests', 'rate_limited', 'errors', 'rate_limited_ratio'}
+        """
+        return {
+            'limit': int(self.limit),
+            'requests': self.requests,
+            'rate_limited': self.rate_limited,
+            'errors': self.errors,
+            'rate_limited_ratio': self.rate_limited_ratio()
+        }
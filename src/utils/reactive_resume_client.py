@@ -4,9 +4,17 @@ Implémente les bonnes pratiques du PDF_GENERATION_GUIDE.md
 """
 
 import asyncio
+import hashlib
+import json
 import logging
+import os
+import re
+import statistics
 import time
-from typing import Dict, Any, Optional
+import uuid
+from collections import deque
+from datetime import datetime, timezone
+from typing import AsyncIterator, Awaitable, Callable, Dict, Any, Iterable, List, Optional, Tuple
 from pathlib import Path
 import aiohttp
 from aiohttp import ClientSession, ClientError, ClientTimeout
@@ -29,6 +37,16 @@ class Settings(BaseSettings):
     reactive_resume_timeout: int = Field(default=30, env="REACTIVE_RESUME_TIMEOUT")
     max_retries: int = Field(default=3, env="REACTIVE_RESUME_MAX_RETRIES")
     retry_delay: float = Field(default=1.0, env="REACTIVE_RESUME_RETRY_DELAY")
+    ready_initial_wait: float = Field(default=0.0, env="REACTIVE_RESUME_READY_INITIAL_WAIT")
+    ready_poll_delay: float = Field(default=0.25, env="REACTIVE_RESUME_READY_POLL_DELAY")
+    ready_max_poll_delay: float = Field(default=2.0, env="REACTIVE_RESUME_READY_MAX_POLL_DELAY")
+    ready_timeout: float = Field(default=30.0, env="REACTIVE_RESUME_READY_TIMEOUT")
+    ready_not_found_timeout: float = Field(default=5.0, env="REACTIVE_RESUME_READY_NOT_FOUND_TIMEOUT")
+    pool_limit: int = Field(default=10, env="REACTIVE_RESUME_POOL_LIMIT")
+    max_concurrent_imports: int = Field(default=4, env="REACTIVE_RESUME_MAX_CONCURRENT_IMPORTS")
+    max_concurrent_prints: int = Field(default=2, env="REACTIVE_RESUME_MAX_CONCURRENT_PRINTS")
+    download_chunk_size: int = Field(default=65536, env="REACTIVE_RESUME_DOWNLOAD_CHUNK_SIZE")
+    delete_after_print: bool = Field(default=False, env="REACTIVE_RESUME_DELETE_AFTER_PRINT")
 
     class Config:
         env_file = ".env"
@@ -40,6 +58,23 @@ class ReactiveResumeError(Exception):
     pass
 
 
+class ReactiveResumeNotFoundError(ReactiveResumeError):
+    """Resume introuvable (404 persistant): inutile de relancer l'étape"""
+    pass
+
+
+# Préfixe des slugs des resumes créés par ce client (cible du garbage collect)
+GENERATED_SLUG_PREFIX = "cv-gen"
+
+# Slugs des versions précédentes du client (cv-<timestamp>), collectés sur demande
+LEGACY_SLUG_PATTERN = re.compile(r"^cv-\d+$")
+
+
+def generate_slug() -> str:
+    """Génère un slug unique, même pour deux imports dans la même seconde"""
+    return f"{GENERATED_SLUG_PREFIX}-{int(time.time())}-{uuid.uuid4().hex[:8]}"
+
+
 class ReactiveResumeClient:
     """
     Client robuste pour l'API Reactive Resume
@@ -52,7 +87,13 @@ class ReactiveResumeClient:
     - Timeout configurable
     """
 
-    def __init__(self, base_url: Optional[str] = None, timeout: int = 30, max_retries: int = 3):
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        timeout: int = 30,
+        max_retries: int = 3,
+        registry_path: Optional[Path] = None
+    ):
         """
         Initialise le client Reactive Resume
 
@@ -60,6 +101,8 @@ class ReactiveResumeClient:
             base_url: URL de base de l'API (ex: http://localhost:3000)
             timeout: Timeout en secondes pour les requêtes
             max_retries: Nombre maximum de tentatives en cas d'échec
+            registry_path: Fichier JSON associant une clé (ex: nom d'offre) à
+                l'ID de son resume, pour le mettre à jour au lieu de le ré-importer
         """
         settings = Settings()
         self.base_url = base_url or settings.reactive_resume_url
@@ -68,8 +111,48 @@ class ReactiveResumeClient:
         self.max_retries = max_retries
         self.retry_delay = settings.retry_delay
 
+        # Détection de disponibilité du resume avant impression
+        self.ready_initial_wait = settings.ready_initial_wait
+        self.ready_poll_delay = settings.ready_poll_delay
+        self.ready_max_poll_delay = settings.ready_max_poll_delay
+        self.ready_timeout = settings.ready_timeout
+        self.ready_not_found_timeout = min(settings.ready_not_found_timeout, settings.ready_timeout)
+        self.readiness_samples = deque(maxlen=200)
+
+        # Session partagée et limites d'étapes simultanées
+        self.pool_limit = settings.pool_limit
+        self.download_chunk_size = settings.download_chunk_size
+        self.delete_after_print = settings.delete_after_print
+        self._session: Optional[ClientSession] = None
+        self._import_semaphore = asyncio.Semaphore(max(1, settings.max_concurrent_imports))
+        self._print_semaphore = asyncio.Semaphore(max(1, settings.max_concurrent_prints))
+
+        # Correspondance clé → ID de resume (réutilisation entre exécutions)
+        self.registry_path = Path(registry_path) if registry_path else None
+        self._registry: Optional[Dict[str, str]] = None
+
         logger.info(f"ReactiveResumeClient initialisé: {self.base_url}")
 
+    async def __aenter__(self) -> "ReactiveResumeClient":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    def _get_session(self) -> ClientSession:
+        """Retourne la session partagée, créée à la première utilisation"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_limit)
+            )
+        return self._session
+
+    async def close(self):
+        """Ferme la session partagée"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
     async def create_resume(self, session: ClientSession, resume_data: Dict[str, Any], title: str = "CV Généré", slug: str = None) -> str:
         """
         Crée un nouveau resume et retourne son ID
@@ -90,8 +173,7 @@ class ReactiveResumeClient:
 
         # Générer un slug unique si non fourni
         if not slug:
-            import time
-            slug = f"cv-{int(time.time())}"
+            slug = generate_slug()
 
         # Préparer les données selon le format de l'API Reactive Resume
         import_data = {
@@ -157,38 +239,147 @@ class ReactiveResumeClient:
         """
         logger.info(f"Génération du PDF pour le resume {resume_id}...")
 
-        # Attendre que le resume soit traité
-        await asyncio.sleep(2)
+        pdf_content = await self._print_when_ready(session, resume_id, lambda response: response.read())
+        logger.info(f"PDF généré avec succès ({len(pdf_content)} bytes)")
+        return pdf_content
 
-        try:
-            async with session.get(
-                f"{self.api_url}/resume/print/{resume_id}",
-                headers={"Accept": "application/pdf"},
-                timeout=aiohttp.ClientTimeout(total=self.timeout)
-            ) as response:
+    async def download_pdf(self, session: ClientSession, resume_id: str, output_path: Path) -> Dict[str, Any]:
+        """
+        Génère le PDF du resume et l'écrit directement sur disque
+
+        Le PDF est téléchargé par blocs dans un fichier temporaire, puis
+        renommé atomiquement: la mémoire utilisée ne dépend pas de la taille
+        du PDF et un fichier partiel n'est jamais visible à output_path.
+
+        Args:
+            session: Session aiohttp active
+            resume_id: ID du resume
+            output_path: Chemin où sauvegarder le PDF
+
+        Returns:
+            {'path': Path, 'size': int, 'sha256': str}
+
+        Raises:
+            ReactiveResumeError: En cas d'erreur lors de la génération
+        """
+        logger.info(f"Génération du PDF pour le resume {resume_id}...")
+
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = output_path.with_name(output_path.name + '.part')
+
+        async def stream_to_file(response: aiohttp.ClientResponse) -> Dict[str, Any]:
+            digest = hashlib.sha256()
+            size = 0
+            try:
+                async with aiofiles.open(tmp_path, 'wb') as f:
+                    async for chunk in response.content.iter_chunked(self.download_chunk_size):
+                        digest.update(chunk)
+                        size += len(chunk)
+                        await f.write(chunk)
+                os.replace(tmp_path, output_path)
+            except BaseException:
+                tmp_path.unlink(missing_ok=True)
+                raise
+            return {'path': output_path, 'size': size, 'sha256': digest.hexdigest()}
+
+        result = await self._print_when_ready(session, resume_id, stream_to_file)
+        logger.info(f"PDF généré avec succès ({result['size']} bytes, sha256 {result['sha256'][:12]})")
+        return result
+
+    async def _print_when_ready(
+        self,
+        session: ClientSession,
+        resume_id: str,
+        consume: Callable[[aiohttp.ClientResponse], Awaitable[Any]]
+    ) -> Any:
+        """
+        Interroge l'endpoint d'impression jusqu'à ce que le resume soit prêt
+
+        Tant que le serveur répond 5xx, la requête est répétée avec un
+        backoff exponentiel court, jusqu'à ready_timeout. Un 404 (resume pas
+        encore indexé) n'est sondé que pendant ready_not_found_timeout: au-delà,
+        le resume est considéré absent. Le délai réellement observé est
+        enregistré dans readiness_samples pour calibrer ready_initial_wait.
+
+        Args:
+            session: Session aiohttp active
+            resume_id: ID du resume
+            consume: Coroutine lisant la réponse 200 (ex: response.read)
+
+        Returns:
+            Résultat de consume
+
+        Raises:
+            ReactiveResumeError: Erreur non récupérable ou délai dépassé
+        """
+        start = time.monotonic()
+        deadline = start + self.ready_timeout
+        delay = self.ready_poll_delay
+        attempt = 0
+
+        if self.ready_initial_wait > 0:
+            await asyncio.sleep(self.ready_initial_wait)
+        not_found_deadline = time.monotonic() + self.ready_not_found_timeout
+
+        while True:
+            attempt += 1
+            try:
+                async with session.get(
+                    f"{self.api_url}/resume/print/{resume_id}",
+                    headers={"Accept": "application/pdf"},
+                    timeout=aiohttp.ClientTimeout(total=self.timeout)
+                ) as response:
+
+                    if response.status == 200:
+                        result = await consume(response)
+                        self._record_readiness(time.monotonic() - start, attempt)
+                        return result
 
-                if response.status == 200:
-                    pdf_content = await response.read()
-                    logger.info(f"PDF généré avec succès ({len(pdf_content)} bytes)")
-                    return pdf_content
-                elif response.status == 404:
-                    logger.error(f"Resume {resume_id} non trouvé")
-                    raise ReactiveResumeError(f"Resume {resume_id} non trouvé")
-                elif response.status >= 500:
-                    error_text = await response.text()
-                    logger.error(f"Erreur serveur {response.status}: {error_text}")
-                    raise ReactiveResumeError(f"Erreur serveur {response.status}: {error_text}")
-                else:
                     error_text = await response.text()
-                    logger.error(f"Erreur HTTP {response.status}: {error_text}")
-                    raise ReactiveResumeError(f"Erreur HTTP {response.status}: {error_text}")
+                    if response.status != 404 and response.status < 500:
+                        logger.error(f"Erreur HTTP {response.status}: {error_text}")
+                        raise ReactiveResumeError(f"Erreur HTTP {response.status}: {error_text}")
+
+            except asyncio.TimeoutError:
+                logger.error(f"Timeout lors de la génération du PDF (> {self.timeout}s)")
+                raise ReactiveResumeError(f"Timeout lors de la génération du PDF")
+            except ClientError as e:
+                logger.error(f"Erreur réseau: {str(e)}")
+                raise ReactiveResumeError(f"Erreur réseau: {str(e)}")
+
+            if response.status == 404 and time.monotonic() + delay > not_found_deadline:
+                logger.error(f"Resume {resume_id} non trouvé")
+                raise ReactiveResumeNotFoundError(f"Resume {resume_id} non trouvé")
+            if time.monotonic() + delay > deadline:
+                logger.error(f"Erreur serveur {response.status}: {error_text}")
+                raise ReactiveResumeError(f"Erreur serveur {response.status}: {error_text}")
+
+            logger.debug(f"Resume {resume_id} pas encore prêt ({response.status}), nouvel essai dans {delay:.2f}s")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.ready_max_poll_delay)
+
+    def _record_readiness(self, elapsed: float, attempts: int):
+        """Enregistre le délai observé avant qu'un resume soit imprimable"""
+        self.readiness_samples.append(elapsed)
+        logger.info(f"Resume prêt après {elapsed:.2f}s ({attempts} tentative(s))")
+
+    def readiness_stats(self) -> Dict[str, float]:
+        """
+        Statistiques des délais de disponibilité observés
 
-        except asyncio.TimeoutError:
-            logger.error(f"Timeout lors de la génération du PDF (> {self.timeout}s)")
-            raise ReactiveResumeError(f"Timeout lors de la génération du PDF")
-        except ClientError as e:
-            logger.error(f"Erreur réseau: {str(e)}")
-            raise ReactiveResumeError(f"Erreur réseau: {str(e)}")
+        Returns:
+            {'count', 'mean', 'p50', 'p90', 'max'} en secondes (vide si aucun échantillon)
+        """
+        samples = sorted(self.readiness_samples)
+        if not samples:
+            return {}
+        return {
+            'count': len(samples),
+            'mean': statistics.fmean(samples),
+            'p50': samples[int(0.5 * (len(samples) - 1))],
+            'p90': samples[int(0.9 * (len(samples) - 1))],
+            'max': samples[-1]
+        }
 
     async def generate_pdf_preview(self, session: ClientSession, resume_id: str) -> bytes:
         """
@@ -260,6 +451,205 @@ class ReactiveResumeClient:
             logger.error(f"Erreur réseau: {str(e)}")
             raise ReactiveResumeError(f"Erreur réseau: {str(e)}")
 
+    async def update_resume(
+        self,
+        session: ClientSession,
+        resume_id: str,
+        resume_data: Dict[str, Any],
+        title: str = None
+    ) -> bool:
+        """
+        Remplace les données d'un resume existant
+
+        Args:
+            session: Session aiohttp active
+            resume_id: ID du resume
+            resume_data: Nouvelles données JSON du resume
+            title: Nouveau titre (inchangé si non fourni)
+
+        Returns:
+            True si mis à jour, False si le resume n'existe plus
+
+        Raises:
+            ReactiveResumeError: En cas d'erreur lors de la mise à jour
+        """
+        logger.info(f"Mise à jour du resume {resume_id}...")
+
+        update_data = {"data": resume_data}
+        if title:
+            update_data["title"] = title
+
+        try:
+            async with session.patch(
+                f"{self.api_url}/resume/{resume_id}",
+                json=update_data,
+                headers={"Content-Type": "application/json"},
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            ) as response:
+
+                if response.status == 200:
+                    logger.info(f"Resume {resume_id} mis à jour")
+                    return True
+                elif response.status == 404:
+                    logger.info(f"Resume {resume_id} introuvable, un nouvel import sera nécessaire")
+                    return False
+                elif response.status == 400:
+                    error_text = await response.text()
+                    logger.error(f"Données invalides (400): {error_text}")
+                    raise ReactiveResumeError(f"Données invalides: {error_text}")
+                else:
+                    error_text = await response.text()
+                    logger.error(f"Erreur HTTP {response.status}: {error_text}")
+                    raise ReactiveResumeError(f"Erreur HTTP {response.status}: {error_text}")
+
+        except asyncio.TimeoutError:
+            logger.error(f"Timeout lors de la mise à jour du resume (> {self.timeout}s)")
+            raise ReactiveResumeError(f"Timeout lors de la mise à jour du resume")
+        except ClientError as e:
+            logger.error(f"Erreur réseau: {str(e)}")
+            raise ReactiveResumeError(f"Erreur réseau: {str(e)}")
+
+    def _load_registry(self) -> Dict[str, str]:
+        """Charge la correspondance clé → ID de resume (une seule fois)"""
+        if self._registry is None:
+            self._registry = {}
+            if self.registry_path and self.registry_path.exists():
+                try:
+                    with open(self.registry_path, 'r', encoding='utf-8') as f:
+                        self._registry = json.load(f)
+                except (OSError, json.JSONDecodeError) as e:
+                    logger.warning(f"Registre des resumes illisible, réinitialisation: {e}")
+        return self._registry
+
+    def _save_registry(self):
+        """Écrit le registre de manière atomique"""
+        if not self.registry_path:
+            return
+        self.registry_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.registry_path.with_name(self.registry_path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._load_registry(), f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.registry_path)
+
+    def registered_ids(self) -> List[str]:
+        """IDs des resumes réutilisés via le registre"""
+        return list(self._load_registry().values())
+
+    async def delete_resume(self, session: ClientSession, resume_id: str) -> bool:
+        """
+        Supprime un resume du serveur
+
+        Args:
+            session: Session aiohttp active
+            resume_id: ID du resume
+
+        Returns:
+            True si supprimé, False s'il n'existait plus
+
+        Raises:
+            ReactiveResumeError: En cas d'erreur lors de la suppression
+        """
+        logger.info(f"Suppression du resume {resume_id}...")
+
+        try:
+            async with session.delete(
+                f"{self.api_url}/resume/{resume_id}",
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            ) as response:
+
+                if response.status in (200, 204):
+                    logger.info(f"Resume {resume_id} supprimé")
+                    return True
+                elif response.status == 404:
+                    logger.info(f"Resume {resume_id} déjà supprimé")
+                    return False
+                else:
+                    error_text = await response.text()
+                    logger.error(f"Erreur HTTP {response.status}: {error_text}")
+                    raise ReactiveResumeError(f"Erreur HTTP {response.status}: {error_text}")
+
+        except asyncio.TimeoutError:
+            logger.error(f"Timeout lors de la suppression du resume (> {self.timeout}s)")
+            raise ReactiveResumeError(f"Timeout lors de la suppression du resume")
+        except ClientError as e:
+            logger.error(f"Erreur réseau: {str(e)}")
+            raise ReactiveResumeError(f"Erreur réseau: {str(e)}")
+
+    async def list_resumes(self, session: ClientSession) -> List[Dict[str, Any]]:
+        """
+        Liste les resumes du compte
+
+        Args:
+            session: Session aiohttp active
+
+        Returns:
+            Liste des resumes (id, slug, createdAt, ...)
+        """
+        logger.info("Récupération de la liste des resumes...")
+
+        try:
+            async with session.get(
+                f"{self.api_url}/resume",
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            ) as response:
+
+                if response.status == 200:
+                    return await response.json()
+                else:
+                    error_text = await response.text()
+                    logger.error(f"Erreur HTTP {response.status}: {error_text}")
+                    raise ReactiveResumeError(f"Erreur HTTP {response.status}: {error_text}")
+
+        except asyncio.TimeoutError:
+            logger.error(f"Timeout lors de la liste des resumes (> {self.timeout}s)")
+            raise ReactiveResumeError(f"Timeout lors de la liste des resumes")
+        except ClientError as e:
+            logger.error(f"Erreur réseau: {str(e)}")
+            raise ReactiveResumeError(f"Erreur réseau: {str(e)}")
+
+    async def garbage_collect(
+        self,
+        older_than_days: float = 0,
+        keep_ids: Iterable[str] = (),
+        include_legacy: bool = False
+    ) -> int:
+        """
+        Supprime les resumes générés par ce client
+
+        Seuls les resumes dont le slug commence par GENERATED_SLUG_PREFIX
+        sont concernés (plus, sur demande, les slugs cv-<timestamp> des
+        versions précédentes); les resumes créés à la main ne sont jamais touchés.
+
+        Args:
+            older_than_days: Ne supprimer que les resumes plus anciens (0 = tous)
+            keep_ids: IDs à conserver
+            include_legacy: Inclure les slugs LEGACY_SLUG_PATTERN
+
+        Returns:
+            Nombre de resumes supprimés
+        """
+        session = self._get_session()
+        keep_ids = set(keep_ids)
+        now = datetime.now(timezone.utc)
+        deleted = 0
+
+        for resume in await self.list_resumes(session):
+            slug = str(resume.get("slug", ""))
+            generated = slug.startswith(f"{GENERATED_SLUG_PREFIX}-")
+            if not generated and not (include_legacy and LEGACY_SLUG_PATTERN.match(slug)):
+                continue
+            if resume.get("id") in keep_ids:
+                continue
+            if older_than_days and resume.get("createdAt"):
+                created_at = datetime.fromisoformat(resume["createdAt"].replace("Z", "+00:00"))
+                if (now - created_at).total_seconds() < older_than_days * 86400:
+                    continue
+            if await self.delete_resume(session, resume["id"]):
+                deleted += 1
+
+        logger.info(f"🧹 {deleted} resume(s) généré(s) supprimé(s)")
+        return deleted
+
     async def check_health(self) -> bool:
         """
         Vérifie que Reactive Resume est accessible
@@ -270,26 +660,138 @@ class ReactiveResumeClient:
         logger.info("Vérification de la santé de Reactive Resume...")
 
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(
-                    f"{self.base_url}/api/health",
-                    timeout=aiohttp.ClientTimeout(total=5)
-                ) as response:
-                    if response.status == 200:
-                        logger.info("✅ Reactive Resume est accessible")
-                        return True
-                    else:
-                        logger.warning(f"⚠️ Reactive Resume répond avec code {response.status}")
-                        return False
+            async with self._get_session().get(
+                f"{self.base_url}/api/health",
+                timeout=aiohttp.ClientTimeout(total=5)
+            ) as response:
+                if response.status == 200:
+                    logger.info("✅ Reactive Resume est accessible")
+                    return True
+                else:
+                    logger.warning(f"⚠️ Reactive Resume répond avec code {response.status}")
+                    return False
         except Exception as e:
             logger.error(f"❌ Reactive Resume non accessible: {str(e)}")
             return False
 
+    async def _with_retry(self, step: str, operation: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Exécute une étape avec retry et backoff exponentiel
+
+        Seule l'étape en échec est rejouée: un échec d'impression ne
+        provoque pas de nouvel import du resume.
+
+        Args:
+            step: Nom de l'étape (pour les logs)
+            operation: Fabrique de la coroutine à exécuter
+
+        Returns:
+            Résultat de l'opération
+
+        Raises:
+            ReactiveResumeError: Après max_retries échecs
+            ReactiveResumeNotFoundError: Resume introuvable (sans nouvelle tentative)
+        """
+        for attempt in range(self.max_retries):
+            try:
+                return await operation()
+            except ReactiveResumeNotFoundError:
+                raise
+            except ReactiveResumeError as e:
+                if attempt < self.max_retries - 1:
+                    wait_time = self.retry_delay * (2 ** attempt)  # Backoff exponentiel
+                    logger.warning(f"{step}: tentative {attempt + 1}/{self.max_retries} échouée: {e}")
+                    logger.info(f"⏳ Retry dans {wait_time}s...")
+                    await asyncio.sleep(wait_time)
+                else:
+                    logger.error(f"❌ {step}: échec après {self.max_retries} tentatives")
+                    raise ReactiveResumeError(f"Échec après {self.max_retries} tentatives: {e}")
+
+        # Cette ligne ne devrait jamais être atteinte, mais pour la forme
+        raise ReactiveResumeError("Nombre de tentatives dépassé")
+
+    async def _save_json_fallback(self, resume_data: Dict[str, Any], output_path: Path) -> Path:
+        """Sauvegarde le CV JSON à la place du PDF"""
+        logger.info("📄 Sauvegarde du CV JSON (fallback sans PDF)")
+        json_path = output_path.with_suffix('.json')
+        json_path.parent.mkdir(parents=True, exist_ok=True)
+        if aiofiles:
+            async with aiofiles.open(json_path, 'w', encoding='utf-8') as f:
+                await f.write(json.dumps(resume_data, indent=2, ensure_ascii=False))
+        else:
+            with open(json_path, 'w', encoding='utf-8') as f:
+                json.dump(resume_data, f, indent=2, ensure_ascii=False)
+        logger.info(f"💾 CV JSON sauvegardé: {json_path}")
+        return json_path
+
+    async def _render(
+        self,
+        session: ClientSession,
+        resume_data: Dict[str, Any],
+        output_path: Path,
+        title: str = None,
+        key: str = None
+    ) -> Path:
+        """
+        Import puis impression d'un resume, chaque étape avec son propre retry
+
+        Le nombre d'imports et d'impressions simultanés est borné par
+        max_concurrent_imports et max_concurrent_prints. Si `key` est connue
+        du registre, le resume existant est mis à jour au lieu d'être
+        ré-importé.
+        """
+        # Générer le titre depuis le nom du fichier si non fourni
+        if not title:
+            title = output_path.stem.replace('_', ' ').replace('-', ' ').title()
+
+        # Le registre n'a pas de sens si les resumes sont supprimés après impression
+        use_registry = bool(key and self.registry_path and not self.delete_after_print)
+
+        # Étape 1: Mettre à jour le resume existant, ou en créer un nouveau
+        async with self._import_semaphore:
+            resume_id = self._load_registry().get(key) if use_registry else None
+            if resume_id is not None:
+                updated = await self._with_retry(
+                    "Mise à jour", lambda: self.update_resume(session, resume_id, resume_data, title=title)
+                )
+                if not updated:
+                    resume_id = None
+
+            if resume_id is None:
+                resume_id = await self._with_retry(
+                    "Import", lambda: self.create_resume(session, resume_data, title=title)
+                )
+                if use_registry and resume_id is not None:
+                    self._load_registry()[key] = resume_id
+                    self._save_registry()
+
+        # Si l'authentification a échoué (resume_id = None), utiliser le fallback
+        if resume_id is None:
+            return await self._save_json_fallback(resume_data, output_path)
+
+        # Étape 2: Générer le PDF, écrit en streaming sur disque
+        async with self._print_semaphore:
+            await self._with_retry(
+                "Impression", lambda: self.download_pdf(session, resume_id, output_path)
+            )
+
+        logger.info(f"✅ PDF généré avec succès: {output_path}")
+
+        # Étape 3 (optionnelle): supprimer le resume devenu inutile sur le serveur
+        if self.delete_after_print:
+            try:
+                await self.delete_resume(session, resume_id)
+            except ReactiveResumeError as e:
+                logger.warning(f"Resume {resume_id} non supprimé: {e}")
+
+        return output_path
+
     async def create_and_generate_pdf(
         self,
         resume_data: Dict[str, Any],
         output_path: Path,
-        title: str = None
+        title: str = None,
+        key: str = None
     ) -> Path:
         """
         Crée un resume et génère son PDF en une seule opération
@@ -298,6 +800,7 @@ class ReactiveResumeClient:
             resume_data: Données JSON du resume
             output_path: Chemin où sauvegarder le PDF
             title: Titre du CV (généré automatiquement depuis output_path si non fourni)
+            key: Clé stable (ex: nom de l'offre) pour réutiliser le même resume
 
         Returns:
             Chemin vers le PDF généré
@@ -306,56 +809,48 @@ class ReactiveResumeClient:
             ReactiveResumeError: En cas d'erreur
         """
         logger.info(f"Génération complète du CV: {output_path}")
+        return await self._render(self._get_session(), resume_data, output_path, title, key=key)
 
-        # Générer le titre depuis le nom du fichier si non fourni
-        if not title:
-            title = output_path.stem.replace('_', ' ').replace('-', ' ').title()
+    async def render_batch(
+        self,
+        jobs: Iterable[Tuple[Dict[str, Any], Path]]
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Génère les PDF d'un lot de resumes sur une même session
 
-        for attempt in range(self.max_retries):
-            try:
-                async with aiohttp.ClientSession() as session:
-                    # Étape 1: Créer le resume
-                    resume_id = await self.create_resume(session, resume_data, title=title)
-
-                    # Si l'authentification a échoué (resume_id = None), utiliser le fallback
-                    if resume_id is None:
-                        logger.info("📄 Sauvegarde du CV JSON (fallback sans PDF)")
-                        json_path = output_path.with_suffix('.json')
-                        json_path.parent.mkdir(parents=True, exist_ok=True)
-                        if aiofiles:
-                            async with aiofiles.open(json_path, 'w', encoding='utf-8') as f:
-                                import json
-                                await f.write(json.dumps(resume_data, indent=2, ensure_ascii=False))
-                        else:
-                            import json
-                            with open(json_path, 'w', encoding='utf-8') as f:
-                                json.dump(resume_data, f, indent=2, ensure_ascii=False)
-                        logger.info(f"💾 CV JSON sauvegardé: {json_path}")
-                        return json_path
-
-                    # Étape 2: Générer le PDF
-                    pdf_content = await self.generate_pdf(session, resume_id)
-
-                    # Étape 3: Sauvegarder
-                    output_path.parent.mkdir(parents=True, exist_ok=True)
-                    async with aiofiles.open(output_path, 'wb') as f:
-                        await f.write(pdf_content)
-
-                    logger.info(f"✅ PDF généré avec succès: {output_path}")
-                    return output_path
+        Les résultats sont renvoyés au fur et à mesure de leur achèvement
+        (pas dans l'ordre des jobs). Un échec n'interrompt pas le lot: toute
+        erreur d'un job (API, réseau, disque) est renvoyée comme son résultat.
 
-            except ReactiveResumeError as e:
-                if attempt < self.max_retries - 1:
-                    wait_time = self.retry_delay * (2 ** attempt)  # Backoff exponentiel
-                    logger.warning(f"Tentative {attempt + 1}/{self.max_retries} échouée: {e}")
-                    logger.info(f"⏳ Retry dans {wait_time}s...")
-                    await asyncio.sleep(wait_time)
-                else:
-                    logger.error(f"❌ Échec après {self.max_retries} tentatives")
-                    raise ReactiveResumeError(f"Échec après {self.max_retries} tentatives: {e}")
+        Destiné aux lots de CV déjà générés (scripts, re-rendus); le pipeline
+        rend chaque offre dès que son JSON est prêt via create_and_generate_pdf,
+        qui partage la même session et réutilise le resume enregistré de l'offre.
 
-        # Cette ligne ne devrait jamais être atteinte, mais pour la forme
-        raise ReactiveResumeError("Nombre de tentatives dépassé")
+        Args:
+            jobs: Paires (resume_data, output_path)
+
+        Yields:
+            {'output_path': Path, 'path': Path | None, 'error': str | None}
+        """
+        session = self._get_session()
+
+        async def render_job(resume_data: Dict[str, Any], output_path: Path) -> Dict[str, Any]:
+            try:
+                path = await self._render(session, resume_data, output_path)
+                return {'output_path': output_path, 'path': path, 'error': None}
+            except Exception as e:
+                logger.error(f"Échec du rendu de {output_path}: {e}")
+                return {'output_path': output_path, 'path': None, 'error': str(e) or type(e).__name__}
+
+        tasks = [asyncio.ensure_future(render_job(data, Path(path))) for data, path in jobs]
+        logger.info(f"Rendu d'un lot de {len(tasks)} CV")
+        try:
+            for next_result in asyncio.as_completed(tasks):
+                yield await next_result
+        finally:
+            # Générateur interrompu: annuler les rendus encore en cours
+            for task in tasks:
+                task.cancel()
 
 
 # Fonctions utilitaires pour compatibilité avec l'ancien code
@@ -375,11 +870,11 @@ async def generate_cv_with_retry(
     Returns:
         Chemin du PDF généré
     """
-    client = ReactiveResumeClient(max_retries=max_retries)
     output_path_obj = Path(output_path)
 
     try:
-        result_path = await client.create_and_generate_pdf(resume_data, output_path_obj)
+        async with ReactiveResumeClient(max_retries=max_retries) as client:
+            result_path = await client.create_and_generate_pdf(resume_data, output_path_obj)
         return str(result_path)
     except ReactiveResumeError:
         # Fallback: sauvegarde du JSON
@@ -0,0 +1,204 @@
+"""
+Cache persistant des réponses OpenRouter
+Évite de repayer une completion dont la requête (messages, modèle,
+température, max_tokens, format) est identique à un appel précédent.
+Les requêtes mises en cache ne sont pas forcément déterministes
+(température > 0): c'est alors le premier tirage qui est conservé.
+"""
+
+import hashlib
+import json
+import logging
+import sqlite3
+import time
+import zlib
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    stage TEXT,
+    response BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at);
+"""
+
+
+def request_key(
+    messages: list,
+    model: str,
+    temperature: float,
+    max_tokens: int,
+    response_format: Optional[Dict[str, Any]] = None
+) -> str:
+    """
+    Empreinte canonique d'une requête de completion
+
+    Le JSON est sérialisé avec des clés triées et sans espaces: deux
+    requêtes équivalentes ont la même clé quel que soit l'ordre de
+    construction des dictionnaires. Le mode streaming n'en fait pas partie
+    (même contenu généré).
+
+    Returns:
+        Clé hexadécimale SHA-256
+    """
+    canonical = json.dumps(
+        {
+            "messages": messages,
+            "model": model,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "response_format": response_format
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+        separators=(',', ':')
+    )
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """
+    Cache SQLite des réponses de l'API, adressé par l'empreinte de la requête
+
+    Politique d'éviction:
+    - une entrée plus ancienne que max_age_days est ignorée puis supprimée
+    - au-delà de max_size_mb, les entrées les moins récemment utilisées
+      sont supprimées en premier
+
+    Les compteurs de succès et d'échecs sont tenus par étape. Les méthodes
+    sont synchrones: les appeler via asyncio.to_thread depuis du code
+    asynchrone.
+    """
+
+    def __init__(self, db_path: Path, max_size_mb: float = 100.0, max_age_days: float = 30.0):
+        """
+        Args:
+            db_path: Chemin de la base SQLite (créée si nécessaire)
+            max_size_mb: Taille totale maximale des réponses stockées (compressées)
+            max_age_days: Âge maximal d'une entrée (0 = illimité)
+        """
+        self.db_path = Path(db_path)
+        self.max_size_bytes = int(max_size_mb * 1024 * 1024)
+        self.max_age_seconds = max_age_days * 86400
+        self.hits: Dict[Optional[str], int] = {}
+        self.misses: Dict[Optional[str], int] = {}
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        """Ouvre une connexion (une par appel, utilisable depuis n'importe quel thread)"""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        return self.max_age_seconds > 0 and now - created_at > self.max_age_seconds
+
+    def get(self, key: str, stage: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Recherche une réponse en cache
+
+        Args:
+            key: Empreinte de la requête (voir request_key)
+            stage: Étape du pipeline, pour les compteurs
+
+        Returns:
+            Réponse de l'API, ou None si absente ou expirée
+        """
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and self._expired(row[1], now):
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                row = None
+            if row is not None:
+                conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+
+        if row is None:
+            self.misses[stage] = self.misses.get(stage, 0) + 1
+            return None
+
+        try:
+            response = json.loads(zlib.decompress(row[0]).decode('utf-8'))
+        except (zlib.error, ValueError) as e:
+            logger.warning(f"Entrée illisible dans le cache des réponses ({e}), ignorée")
+            self.misses[stage] = self.misses.get(stage, 0) + 1
+            return None
+
+        self.hits[stage] = self.hits.get(stage, 0) + 1
+        return response
+
+    def put(self, key: str, response: Dict[str, Any], stage: Optional[str] = None):
+        """
+        Enregistre une réponse puis applique la politique d'éviction
+
+        Args:
+            key: Empreinte de la requête
+            response: Réponse de l'API
+            stage: Étape du pipeline
+        """
+        blob = zlib.compress(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, stage, response, size, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, stage, blob, len(blob), now, now)
+            )
+            self._evict(conn, now)
+
+    def _evict(self, conn: sqlite3.Connection, now: float):
+        """Supprime les entrées expirées puis les moins récemment utilisées au-delà de la taille max"""
+        if self.max_age_seconds > 0:
+            conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.max_age_seconds,))
+
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_size_bytes:
+            return
+
+        evicted = []
+        for key, size in conn.execute("SELECT key, size FROM responses ORDER BY accessed_at"):
+            if total <= self.max_size_bytes:
+                break
+            evicted.append((key,))
+            total -= size
+        conn.executemany("DELETE FROM responses WHERE key = ?", evicted)
+        logger.info(f"Cache des réponses: {len(evicted)} entrée(s) évincée(s)")
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Compteurs du cache
+
+        Returns:
+            {'hits', 'misses', 'entries', 'size_mb', 'stages': {étape: {'hits', 'misses'}}}
+        """
+        with self._connect() as conn:
+            entries, size = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        return {
+            'hits': sum(self.hits.values()),
+            'misses': sum(self.misses.values()),
+            'entries': entries,
+            'size_mb': size / (1024 * 1024),
+            'stages': {
+                stage: {'hits': self.hits.get(stage, 0), 'misses': self.misses.get(stage, 0)}
+                for stage in set(self.hits) | set(self.misses)
+            }
+        }
@@ -0,0 +1,200 @@
+"""
+Index inversé des données d'éducation et d'identité
+Remplace la recherche `thème in contenu` sur chaque fichier par une recherche
+de termes normalisés (minuscules, sans accents, racinisés)
+"""
+
+import json
+import logging
+import os
+import re
+import unicodedata
+from pathlib import Path
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION = 2
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+_PARAGRAPH_RE = re.compile(r"\n\s*\n")
+
+STOPWORDS = {
+    # Français
+    "a", "au", "aux", "avec", "ce", "ces", "cet", "cette", "d", "dans", "de", "des", "du",
+    "en", "est", "et", "il", "ils", "l", "la", "le", "les", "leur", "leurs", "n", "ne",
+    "ou", "par", "pas", "pour", "qu", "que", "qui", "s", "sa", "se", "ses", "son", "sont",
+    "sur", "un", "une",
+    # Anglais
+    "an", "and", "for", "in", "is", "of", "on", "the", "to", "with",
+}
+
+# Suffixes retirés par le racinisateur léger (du plus long au plus court);
+# un seul suffixe est retiré et la racine garde au moins 3 caractères
+_SUFFIXES = [
+    ("issements", ""), ("issement", ""), ("ements", ""), ("ement", ""),
+    ("ations", ""), ("ation", ""), ("itions", ""), ("ition", ""),
+    ("iques", ""), ("ique", ""), ("istes", ""), ("iste", ""), ("ismes", ""), ("isme", ""),
+    ("euses", ""), ("euse", ""), ("eurs", ""), ("eur", ""),
+    ("ives", ""), ("ive", ""), ("ifs", ""), ("if", ""),
+    ("ites", ""), ("ite", ""),
+    ("iennes", "ien"), ("ienne", "ien"), ("elles", "el"), ("elle", "el"),
+    ("aux", "al"),
+    ("es", ""), ("s", ""), ("x", ""), ("e", ""),
+]
+
+
+def fold(text: str) -> str:
+    """Met en minuscules et retire les accents (é → e, ç → c...)"""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def stem(word: str) -> str:
+    """
+    Racinisation légère pour le français (et l'anglais courant)
+
+    Volontairement simple: le même traitement est appliqué aux documents et
+    aux requêtes, seule la cohérence compte.
+    """
+    if len(word) <= 4 or word.isdigit():
+        return word
+    for suffix, replacement in _SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            return word[:-len(suffix)] + replacement
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Découpe un texte en termes normalisés
+
+    Returns:
+        Termes (minuscules, sans accents, racinisés, mots vides retirés)
+    """
+    return [stem(word) for word in _WORD_RE.findall(fold(text)) if word not in STOPWORDS]
+
+
+def split_paragraphs(text: str) -> List[str]:
+    """Découpe un texte en paragraphes (séparés par une ligne vide)"""
+    return [p.strip() for p in _PARAGRAPH_RE.split(text) if p.strip()]
+
+
+class TextIndex:
+    """
+    Index inversé terme → document → paragraphe → fréquence
+
+    Chaque document est identifié par un nom (ex: "bio/genetique"). L'index
+    est persisté en JSON: au chargement suivant, un document dont la taille
+    et le mtime n'ont pas changé n'est pas ré-analysé. Le classement des
+    paragraphes est fait par BM25Ranker à partir de ces statistiques.
+
+    Usage:
+        index = TextIndex(Path("data/.cache/text_index.json"))
+        index.refresh("bio/genetique", path, content)
+        index.save()
+        ranker = BM25Ranker(index, {"bio/genetique": content})
+    """
+
+    def __init__(self, index_path: Optional[Path] = None):
+        """
+        Args:
+            index_path: Fichier de persistance (None = index en mémoire uniquement)
+        """
+        self.index_path = Path(index_path) if index_path else None
+        self.documents: Dict[str, Dict] = {}
+        self.postings: Dict[str, Dict[str, Dict[int, int]]] = {}
+        self._dirty = False
+        if self.index_path and self.index_path.exists():
+            self._load()
+
+    def _load(self):
+        """Charge l'index persisté (ignoré s'il est illisible ou d'une autre version)"""
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Index texte illisible, reconstruction: {e}")
+            return
+        if data.get("version") != INDEX_VERSION:
+            return
+        self.documents = data["documents"]
+        self.postings = {
+            term: {doc: {int(para): tf for para, tf in paras.items()} for doc, paras in docs.items()}
+            for term, docs in data["postings"].items()
+        }
+
+    def save(self):
+        """Écrit l'index de manière atomique, seulement s'il a changé"""
+        if not self.index_path or not self._dirty:
+            return
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.index_path.with_name(self.index_path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                "version": INDEX_VERSION,
+                "documents": self.documents,
+                "postings": self.postings,
+            }, f, ensure_ascii=False)
+        os.replace(tmp_path, self.index_path)
+        self._dirty = False
+
+    def is_fresh(self, doc_id: str, path: Path) -> bool:
+        """Indique si le document est indexé à partir de la version actuelle du fichier"""
+        entry = self.documents.get(doc_id)
+        if entry is None:
+            return False
+        stat = Path(path).stat()
+        return entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size
+
+    def refresh(self, doc_id: str, path: Path, text: str) -> bool:
+        """
+        (Ré)indexe un document si le fichier a changé depuis la dernière indexation
+
+        Args:
+            doc_id: Identifiant du document
+            path: Fichier source (pour la taille et le mtime)
+            text: Contenu du fichier
+
+        Returns:
+            True si le document a été (ré)indexé
+        """
+        if self.is_fresh(doc_id, path):
+            return False
+        stat = Path(path).stat()
+        self.add_document(doc_id, text, mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+        return True
+
+    def add_document(self, doc_id: str, text: str, mtime_ns: int = 0, size: int = 0):
+        """Indexe un document paragraphe par paragraphe (remplace l'entrée existante)"""
+        self.remove_document(doc_id)
+        paragraph_lengths = []
+        for para_num, paragraph in enumerate(split_paragraphs(text)):
+            terms = tokenize(paragraph)
+            paragraph_lengths.append(len(terms))
+            for term in terms:
+                paras = self.postings.setdefault(term, {}).setdefault(doc_id, {})
+                paras[para_num] = paras.get(para_num, 0) + 1
+
+        self.documents[doc_id] = {
+            "mtime_ns": mtime_ns,
+            "size": size,
+            "paragraphs": paragraph_lengths,
+        }
+        self._dirty = True
+
+    def remove_document(self, doc_id: str):
+        """Retire un document de l'index"""
+        if self.documents.pop(doc_id, None) is None:
+            return
+        for term in list(self.postings):
+            docs = self.postings[term]
+            if docs.pop(doc_id, None) is not None and not docs:
+                del self.postings[term]
+        self._dirty = True
+
+    def prune(self, keep_ids):
+        """Retire les documents qui ne sont plus présents sur le disque"""
+        keep_ids = set(keep_ids)
+        for doc_id in [d for d in self.documents if d not in keep_ids]:
+            self.remove_document(doc_id)